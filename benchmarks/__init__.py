@@ -0,0 +1 @@
+"""Standalone performance scripts; run them from the repository root with ``python -m``."""
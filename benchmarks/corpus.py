@@ -0,0 +1,57 @@
+"""Synthetic business documents for the benchmarks."""
+import io
+import random
+
+WORDS = (
+    "revenue margin pipeline churn quarter forecast customer segment region pricing "
+    "contract renewal headcount budget vendor invoice roadmap launch retention growth"
+).split()
+
+
+def paragraph(rng, words=80):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_txt(pages, seed=0):
+    rng = random.Random(seed)
+    return "\n\n".join(paragraph(rng) for _ in range(pages * 4)).encode()
+
+
+def make_pdf(pages, seed=0):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(seed)
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for number in range(pages):
+        pdf.drawString(72, 750, f"Page {number + 1}")
+        y = 720
+        while y > 72:
+            pdf.drawString(72, y, paragraph(rng, words=12))
+            y -= 14
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def make_pptx(pages, seed=0):
+    import pptx
+
+    rng = random.Random(seed)
+    deck = pptx.Presentation()
+    layout = deck.slide_layouts[1]
+    for number in range(pages):
+        slide = deck.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {number + 1}"
+        slide.placeholders[1].text = "\n\n".join(paragraph(rng) for _ in range(4))
+    buffer = io.BytesIO()
+    deck.save(buffer)
+    return buffer.getvalue()
+
+
+BUILDERS = {"txt": make_txt, "pdf": make_pdf, "pptx": make_pptx}
+
+
+def make_document(file_format, pages, seed=0):
+    return BUILDERS[file_format](pages, seed)
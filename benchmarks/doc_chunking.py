@@ -0,0 +1,85 @@
+"""Extraction-to-chunks throughput and peak memory for BI Suite uploads.
+
+Compares joining every page into one string and re-splitting it (``joined``)
+with streaming ``iter_document_text`` straight into ``iter_chunks``
+(``streamed``), the path ``condense_document`` uses. Each mode runs in a fresh
+interpreter so peak RSS is not shared between them. ``traced_peak_mb`` is
+the peak of Python allocations made after the file was read, i.e. the
+extraction and chunking overhead on top of the upload itself::
+
+    python -m benchmarks.doc_chunking --format pptx --pages 2000
+    python -m benchmarks.doc_chunking --format txt --pages 20000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import BUILDERS, make_document
+from utils.chunking import chunk_text, iter_chunks
+from utils.doc_extract import iter_document_text
+
+CHUNK_TOKENS = 3000
+MODES = ("joined", "streamed")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_mode(mode, path):
+    extension = os.path.splitext(path)[1]
+    with open(path, "rb") as handle:
+        data = handle.read()
+    tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "joined":
+        chunks = chunk_text("\n".join(iter_document_text(data, extension)), max_tokens=CHUNK_TOKENS)
+        count = len(chunks)
+    else:
+        count = sum(1 for _ in iter_chunks(iter_document_text(data, extension), max_tokens=CHUNK_TOKENS))
+    elapsed = time.perf_counter() - started
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "chunks": count,
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(len(data) / (1024 * 1024) / elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "traced_peak_mb": round(traced_peak / (1024 * 1024), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--format", choices=sorted(BUILDERS), default="pptx")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run_mode(args.run, args.path)))
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"corpus.{args.format}")
+        with open(path, "wb") as handle:
+            handle.write(make_document(args.format, args.pages))
+        print(f"{args.format}, {args.pages} pages, {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.doc_chunking", "--run", mode, "--path", path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            print(json.loads(output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Extraction-only timings for resume PDFs: inline vs the shared process pool.
+
+Generates a corpus of PDFs with reportlab and extracts it three ways:
+
+- ``inline``: every page in the calling process
+- ``page_ranges``: each document split into page ranges over the pool
+  (``iter_page_texts`` for long documents)
+- ``documents``: whole documents spread over the pool (batch screening)
+
+Pool start-up is timed separately, since it is paid once per process::
+
+    python -m benchmarks.pdf_extraction --documents 50 --pages 4
+    python -m benchmarks.pdf_extraction --documents 5 --pages 60
+"""
+import argparse
+import time
+
+from benchmarks.corpus import make_pdf
+from utils.pdf_text import POOL_WORKERS, extract_document_text, extract_pdf_text, get_pool
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=4)
+    args = parser.parse_args()
+
+    corpus = [make_pdf(args.pages, seed=seed) for seed in range(args.documents)]
+    megabytes = sum(map(len, corpus)) / (1024 * 1024)
+    print(f"{args.documents} documents x {args.pages} pages, {megabytes:.1f} MB, {POOL_WORKERS} pool workers")
+
+    pool = get_pool()
+    _, startup = timed(lambda: list(pool.map(abs, range(POOL_WORKERS))))
+    print(f"pool start-up: {startup:.2f}s")
+
+    runs = {
+        "inline": lambda: [extract_pdf_text(data, min_pages_for_pool=float("inf")) for data in corpus],
+        "page_ranges": lambda: [extract_pdf_text(data, min_pages_for_pool=0) for data in corpus],
+        "documents": lambda: list(pool.map(extract_document_text, corpus)),
+    }
+    expected = None
+    for name, run in runs.items():
+        texts, elapsed = timed(run)
+        expected = expected or texts
+        pages_per_second = args.documents * args.pages / elapsed
+        print(f"{name:>12}: {elapsed:6.2f}s  {pages_per_second:7.1f} pages/s  {megabytes / elapsed:6.2f} MB/s"
+              f"  {'ok' if texts == expected else 'TEXT MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
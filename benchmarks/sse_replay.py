@@ -0,0 +1,65 @@
+"""Replay a recorded watsonx ``generation_stream`` response through the SSE parser.
+
+Feeds the fixture's raw bytes through the same line splitting
+``requests.Response.iter_lines()`` does, both whole and in small network-sized
+chunks that cut multi-byte characters in half, and checks the reassembled text
+comes out intact. Reports parse throughput for the repeated fixture::
+
+    python -m benchmarks.sse_replay
+    python -m benchmarks.sse_replay --repeat 20000
+"""
+import argparse
+import os
+import time
+
+from utils.sse import iter_sse_events, iter_watsonx_text
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "watsonx_generation_stream.sse")
+EXPECTED = "Bonjour, café — prêt. 日本語のテキスト ✓ 👍"
+
+
+def iter_lines(data, chunk_size):
+    """Split ``data`` into lines across ``chunk_size`` reads, like ``Response.iter_lines()``."""
+    pending = None
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.splitlines()
+        if lines and chunk and lines[-1] and lines[-1][-1:] == chunk[-1:]:
+            pending = lines.pop()
+        else:
+            pending = None
+        yield from lines
+    if pending is not None:
+        yield pending
+
+
+def replay(data, chunk_size):
+    return "".join(iter_watsonx_text(iter_sse_events(iter_lines(data, chunk_size))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    with open(FIXTURE, "rb") as handle:
+        data = handle.read()
+
+    for chunk_size in (len(data), 512, 7, 1):
+        text = replay(data, chunk_size)
+        assert text == EXPECTED, f"chunk_size={chunk_size}: {text!r} != {EXPECTED!r}"
+    print(f"decoded ok: {EXPECTED}")
+
+    events = data.count(b"\nevent: ")
+    body = data * args.repeat
+    started = time.perf_counter()
+    replay(body, 512)
+    elapsed = time.perf_counter() - started
+    print(f"{events * args.repeat} events, {len(body) / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({events * args.repeat / elapsed:,.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,24 @@ from datetime import datetime, date
 import os
 import json
 from supabase import create_client, Client
-import requests
 import io
 from dotenv import load_dotenv
 import re
-import pdfplumber
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.attendance_queue import CLOCK_IN, CLOCK_OUT, get_attendance_queue
+from utils.attendance_summary import attendance_display_frame, get_attendance_summary
+from utils.bulk_io import EMPLOYEE_COLUMNS, iter_csv_chunks, read_employee_chunks, upsert_in_batches, validate_employees
+from utils.conversation import ConversationStore
+from utils.employee_index import get_employee_index
+from utils.ibm_iam import get_token_manager
+from utils.llm_cache import cached_completion
+from utils.llm_gateway import BATCH, INTERACTIVE, get_gateway
+from utils.pdf_text import PDF_EXTRACTOR, clean_text, extract_pdf_text
+from utils.resume_ranker import iter_uploaded_pdfs, screen_resumes
+from utils.text_cache import get_text_cache
+from utils.payroll import PayrollRun, build_payroll_frame, render_payslip_text
+from utils.payslip import render_payslip_html, render_payslip_pdf, render_payslips_pdf, render_payslips_zip
 
 # Load environment variables
 load_dotenv()
@@ -22,6 +35,8 @@ supabase: Client = create_client(
 # Initialize IBM Granite
 GRANITE_API_KEY = os.getenv('GRANITE_API_KEY')
 GRANITE_API_URL = os.getenv('GRANITE_API_URL')
+# Granite calls go through the shared, rate-limited gateway (reads GRANITE_API_KEY)
+llm = get_gateway()
 
 # Set page configuration
 st.set_page_config(page_title="HRMS Dashboard", layout="wide")
@@ -36,22 +51,85 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+EMPLOYEE_PAGE_SIZE = 50
+EMPLOYEE_PICKER_LIMIT = 50
+EMPLOYEE_INDEX_TTL = 300
+ATTENDANCE_FLUSH_INTERVAL = 2.0
+ATTENDANCE_LOOKUP_CHUNK = 200
+RESUME_ANALYSIS_WORKERS = 4
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+ATTENDANCE_LATE_AFTER = datetime.strptime("09:15", "%H:%M").time()
+DEPARTMENTS = ["HR", "IT", "Finance", "Marketing"]
+
 class EmployeeManagement:
     @staticmethod
     def create_employee(data):
-        return supabase.table('employees').insert(data).execute()
+        response = supabase.table('employees').insert(data).execute()
+        for row in response.data:
+            employee_index().upsert(row['id'], row['name'])
+        return response
     
     @staticmethod
-    def get_employees():
-        return supabase.table('employees').select("*").execute()
+    def get_employees_page(columns="*", after_id=None, limit=EMPLOYEE_PAGE_SIZE, department=None, role=None):
+        """One keyset-paginated page of employees ordered by id.
+
+        ``columns`` must include ``id`` so the next page can start after the
+        last row returned.
+        """
+        query = supabase.table('employees').select(columns).order('id').limit(limit)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        if department:
+            query = query.eq('department', department)
+        if role:
+            query = query.eq('role', role)
+        return query.execute()
+
+    @staticmethod
+    def iter_employees(columns="id, name", page_size=1000, department=None, role=None):
+        after_id = None
+        while True:
+            page = EmployeeManagement.get_employees_page(columns, after_id, page_size, department, role)
+            yield from page.data
+            if len(page.data) < page_size:
+                break
+            after_id = page.data[-1]['id']
     
+    @staticmethod
+    def upsert_employees(records):
+        """Insert or update a batch of employees, matched on email."""
+        response = supabase.table('employees').upsert(records, on_conflict='email').execute()
+        for row in response.data:
+            employee_index().upsert(row['id'], row['name'])
+        return response
+
     @staticmethod
     def update_employee(employee_id, data):
-        return supabase.table('employees').update(data).eq('id', employee_id).execute()
+        response = supabase.table('employees').update(data).eq('id', employee_id).execute()
+        if 'name' in data:
+            for row in response.data:
+                employee_index().upsert(row['id'], row['name'])
+        return response
     
     @staticmethod
     def delete_employee(employee_id):
-        return supabase.table('employees').delete().eq('id', employee_id).execute()
+        response = supabase.table('employees').delete().eq('id', employee_id).execute()
+        employee_index().remove(employee_id)
+        return response
+
+def employee_index():
+    return get_employee_index(lambda: EmployeeManagement.iter_employees("id, name"), ttl=EMPLOYEE_INDEX_TTL)
+
+def employee_options(search, include_all=False):
+    """Picker options and labels for the employees matching ``search``."""
+    matches = employee_index().search(search, limit=EMPLOYEE_PICKER_LIMIT)
+    names = dict(matches)
+    options = [employee_id for employee_id, _ in matches]
+    if include_all:
+        names[0] = "All Employees"
+        options = [0] + options
+    return options, names
 
 class PayrollManagement:
     @staticmethod
@@ -59,7 +137,7 @@ class PayrollManagement:
         return basic_pay + sum(bonuses) - sum(deductions)
     
     @staticmethod
-    def generate_payslip(employee_id, month, year):
+    def payslip_record(employee_id):
         employee = supabase.table('employees').select("*").eq('id', employee_id).execute()
         if not employee.data:
             raise ValueError(f"No employee found with ID {employee_id}")
@@ -68,12 +146,38 @@ class PayrollManagement:
         if not salary_details.data:
             raise ValueError(f"No salary details found for employee ID {employee_id}")
         
-        prompt = f"""Generate a detailed payslip for:
-        Employee: {employee.data[0]['name']}
+        frame, _ = build_payroll_frame(employee.data, salary_details.data, PayrollManagement.calculate_salary)
+        return frame.to_dict("records")[0]
+
+    @staticmethod
+    def generate_payslip(employee_id, month, year, enrich=False):
+        """Render a payslip from stored data; ``enrich`` adds an AI-written note."""
+        record = PayrollManagement.payslip_record(employee_id)
+        if enrich:
+            record['notes'] = PayrollManagement.payslip_narrative(record, month, year).strip()
+        record['payslip'] = render_payslip_text(record, month, year)
+        if record.get('notes'):
+            record['payslip'] += f"\nNotes:\n{record['notes']}\n"
+        return record
+
+    @staticmethod
+    def payslip_narrative(record, month, year, priority=INTERACTIVE):
+        prompt = f"""Write a short, friendly note (under 80 words) to accompany this payslip.
+        Mention the pay period and net pay; do not restate every line item.
+        Employee: {record['name']}
         Month: {month} {year}
-        Basic Pay: {salary_details.data[0]['basic_pay']}
+        Net Pay: {record['net_pay']:,.2f}
         """
-        return generate_document(prompt, "payslip")
+        return generate_document(prompt, "payslip", priority=priority)
+
+    @staticmethod
+    def payroll_frame():
+        """All employees with their latest salary, totals computed in one vectorised pass."""
+        return build_payroll_frame(
+            EmployeeManagement.iter_employees("id, name, department, role"),
+            SalaryManagement.iter_salary_details(),
+            PayrollManagement.calculate_salary
+        )
 
 class AttendanceManagement:
     @staticmethod
@@ -83,13 +187,78 @@ class AttendanceManagement:
             'clock_in': datetime.now().isoformat(),
             'date': date.today().isoformat()
         }
-        return supabase.table('attendance').insert(data).execute()
+        return AttendanceManagement.bulk_clock_in([data])
     
     @staticmethod
     def clock_out(employee_id):
         current_time = datetime.now().isoformat()
-        return supabase.table('attendance').update({'clock_out': current_time}).eq('employee_id', employee_id).eq('date', date.today().isoformat()).execute()
+        response = supabase.table('attendance').update({'clock_out': current_time}).eq('employee_id', employee_id).eq('date', date.today().isoformat()).execute()
+        attendance_summary().record(employee_id, date.today(), clock_out=current_time)
+        return response
     
+    @staticmethod
+    def bulk_clock_in(rows):
+        # Keep a clock-in already stored for (employee_id, date), but fill a NULL one:
+        # the day's clock-out may have been written first (e.g. after a failed flush).
+        clocked_in = AttendanceManagement.clocked_in_keys(rows)
+        rows = [row for row in rows if (row['employee_id'], row['date']) not in clocked_in]
+        if not rows:
+            return None
+        response = supabase.table('attendance').upsert(rows, on_conflict='employee_id,date').execute()
+        for row in rows:
+            attendance_summary().record(row['employee_id'], row['date'], clock_in=row['clock_in'])
+        return response
+
+    @staticmethod
+    def clocked_in_keys(rows):
+        """``(employee_id, date)`` pairs among ``rows`` that already have a clock-in stored.
+
+        Looked up one date at a time in employee chunks, so each response holds at
+        most ``ATTENDANCE_LOOKUP_CHUNK`` rows and is never cut short by the API row limit.
+        """
+        by_date = {}
+        for row in rows:
+            by_date.setdefault(row['date'], set()).add(row['employee_id'])
+        clocked_in = set()
+        for day, employee_ids in by_date.items():
+            employee_ids = sorted(employee_ids)
+            for start in range(0, len(employee_ids), ATTENDANCE_LOOKUP_CHUNK):
+                existing = (supabase.table('attendance')
+                            .select("employee_id, clock_in")
+                            .eq('date', day)
+                            .in_('employee_id', employee_ids[start:start + ATTENDANCE_LOOKUP_CHUNK])
+                            .execute())
+                clocked_in.update((row['employee_id'], day) for row in existing.data if row['clock_in'])
+        return clocked_in
+
+    @staticmethod
+    def bulk_clock_out(rows):
+        response = supabase.table('attendance').upsert(rows, on_conflict='employee_id,date').execute()
+        for row in rows:
+            attendance_summary().record(row['employee_id'], row['date'], clock_out=row['clock_out'])
+        return response
+
+    @staticmethod
+    def iter_attendance_rows(start_date, page_size=1000):
+        """Raw clock times since ``start_date``, fetched in keyset pages to get past the API row limit."""
+        after_id = None
+        while True:
+            query = (supabase.table('attendance')
+                     .select("id, employee_id, date, clock_in, clock_out")
+                     .gte('date', start_date))
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            page = query.order('id').limit(page_size).execute()
+            yield from page.data
+            if len(page.data) < page_size:
+                break
+            after_id = page.data[-1]['id']
+
+    @staticmethod
+    def record_swipe(employee_id, kind, at=None):
+        """Queue a badge swipe for the next bulk flush. Returns False if the queue is full."""
+        return attendance_queue().submit(employee_id, kind, at)
+
     @staticmethod
     def get_attendance(employee_id=None, start_date=None, end_date=None):
         query = supabase.table('attendance').select("*, employees(name)").order('date', desc=True)
@@ -101,13 +270,51 @@ class AttendanceManagement:
             query = query.lte('date', end_date)
         return query.execute()
 
+def attendance_queue():
+    return get_attendance_queue(
+        AttendanceManagement.bulk_clock_in,
+        AttendanceManagement.bulk_clock_out,
+        flush_interval=ATTENDANCE_FLUSH_INTERVAL
+    )
+
+def attendance_summary():
+    return get_attendance_summary(
+        AttendanceManagement.iter_attendance_rows,
+        lambda: EmployeeManagement.iter_employees("id, department"),
+        late_after=ATTENDANCE_LATE_AFTER
+    )
+
 class GraniteAI:
     @staticmethod
-    def process_chat_query(query):
-        prompt = f"""You are an HR assistant. Please respond to this HR-related question:
+    def build_chat_prompt(query, context=""):
+        if context:
+            query = f"""{query}
+
+        Conversation context (use it when the question refers back to earlier turns):
+        {context}"""
+        return f"""You are an HR assistant. Please respond to this HR-related question:
         Question: {query}
         Provide a professional and helpful response."""
-        return generate_document(prompt, "chat")
+
+    @staticmethod
+    def process_chat_query(query, context=""):
+        return generate_document(GraniteAI.build_chat_prompt(query, context), "chat")
+
+    @staticmethod
+    def stream_chat_query(query, context=""):
+        return generate_document_stream(GraniteAI.build_chat_prompt(query, context), "chat")
+
+    @staticmethod
+    def summarize_conversation(summary, transcript):
+        prompt = f"""Update the running summary of an HR assistant conversation with the new turns below.
+        Keep names, dates, figures and open questions. Reply with the updated summary only, in under 200 words.
+
+        Current summary:
+        {summary or "(none)"}
+
+        New turns:
+        {transcript}"""
+        return generate_document(prompt, "summary")
     
     @staticmethod
     def analyze_sentiment(text):
@@ -121,36 +328,40 @@ class GraniteAI:
         except:
             return {"score": 0, "label": "neutral"}
     
+    @staticmethod
+    def analyze_resume_text(cleaned_text, job_description=None, priority=INTERACTIVE):
+        fit = f"""
+            6. Fit against this job description, with strengths and gaps:
+            {job_description}
+            """ if job_description else ""
+        prompt = f"""Please analyze this resume and provide the key information in a clear format:
+
+            Resume Text:
+            {cleaned_text}
+
+            Please extract and organize:
+            1. Personal Information
+            2. Professional Summary
+            3. Skills
+            4. Work Experience
+            5. Education{fit}
+
+            Make necessary corrections to words for example: Llama3370b should be written as Llama-3.3-70b.
+            """
+        return generate_document(prompt, "resume", priority=priority)
+
     @staticmethod
     def parse_resume(pdf_file):
         try:
-            with pdfplumber.open(pdf_file) as pdf_reader:
-                extracted_text = ""
-                for page in pdf_reader.pages:
-                    extracted_text += page.extract_text() + "\n"
-                cleaned_text = " ".join(extracted_text.split())
-                cleaned_text = ''.join(char for char in cleaned_text if char.isalnum() or char.isspace())
-                if not cleaned_text.strip():
-                    return "Error: No text could be extracted from the PDF"
-                prompt = f"""Please analyze this resume and provide the key information in a clear format:
-
-                Resume Text:
-                {cleaned_text}
-
-                Please extract and organize:
-                1. Personal Information
-                2. Professional Summary
-                3. Skills
-                4. Work Experience
-                5. Education
-
-                Make necessary corrections to words for example: Llama3370b should be written as Llama-3.3-70b.
-                """
-                response = generate_document(prompt, "resume")
-                if response:
-                    return response
-                else:
-                    return "Error: Could not extract information from resume"
+            extracted_text = get_text_cache().get_or_extract(pdf_file.getvalue(), PDF_EXTRACTOR, extract_pdf_text)
+            cleaned_text = clean_text(extracted_text)
+            if not cleaned_text.strip():
+                return "Error: No text could be extracted from the PDF"
+            response = GraniteAI.analyze_resume_text(cleaned_text)
+            if response:
+                return response
+            else:
+                return "Error: Could not extract information from resume"
         except Exception as e:
             return f"Error: Failed to process resume - {str(e)}"
 
@@ -166,6 +377,21 @@ class SalaryManagement:
             query = query.eq('employee_id', employee_id)
         return query.execute()
     
+    @staticmethod
+    def iter_salary_details(page_size=1000):
+        # Keyset on the unique id: employees have several salary rows, so
+        # OFFSET pages ordered by employee_id could skip or repeat rows.
+        after_id = None
+        while True:
+            query = supabase.table('salary_details').select("*").order('id').limit(page_size)
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            page = query.execute()
+            yield from page.data
+            if len(page.data) < page_size:
+                break
+            after_id = page.data[-1]['id']
+
     @staticmethod
     def update_salary(employee_id, basic_pay):
         data = {
@@ -174,72 +400,266 @@ class SalaryManagement:
         }
         return supabase.table('salary_details').update(data).eq('employee_id', employee_id).execute()
 
-def get_iam_token(api_key):
-    url = "https://iam.cloud.ibm.com/identity/token"
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    data = {"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": api_key}
-    response = requests.post(url, headers=headers, data=data)
-    if response.status_code == 200:
-        return response.json()["access_token"]
-    else:
-        raise Exception(f"Failed to get IAM token: {response.text}")
-
-def generate_document(prompt, doc_type):
-    iam_token = get_iam_token(GRANITE_API_KEY)
-    url = "https://us-south.ml.cloud.ibm.com/ml/v1/text/generation?version=2023-05-29"
+GRANITE_MODEL = "ibm/granite-3-8b-instruct"
+GRANITE_PARAMETERS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 900,
+    "min_new_tokens": 0,
+    "repetition_penalty": 1
+}
+# Request fields that are not generation parameters, passed through by the watsonx provider.
+GRANITE_REQUEST_OPTIONS = {
+    "project_id": "0d802a37-ca64-420e-864e-e7cdd8b8b006",
+    "moderations": {
+        "hap": {
+            "input": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}},
+            "output": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}}
+        },
+        "pii": {
+            "input": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}},
+            "output": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}}
+        }
+    }
+}
+
+def build_granite_prompt(prompt):
     system_prompt = """You are Granite, an AI language model developed by IBM in 2024. 
     You provide accurate, helpful, and ethical responses."""
-    full_prompt = f"""<|start_of_role|>system<|end_of_role|>{system_prompt}<|end_of_text|>
+    return f"""<|start_of_role|>system<|end_of_role|>{system_prompt}<|end_of_text|>
 <|start_of_role|>user<|end_of_role|>{prompt}<|end_of_text|>
 <|start_of_role|>assistant<|end_of_role|>"""
-    body = {
-        "input": full_prompt,
-        "parameters": {
-            "decoding_method": "greedy",
-            "max_new_tokens": 900,
-            "min_new_tokens": 0,
-            "repetition_penalty": 1
-        },
-        "model_id": "ibm/granite-3-8b-instruct",
-        "project_id": "0d802a37-ca64-420e-864e-e7cdd8b8b006",
-        "moderations": {
-            "hap": {
-                "input": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}},
-                "output": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}}
-            },
-            "pii": {
-                "input": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}},
-                "output": {"enabled": True, "threshold": 0.5, "mask": {"remove_entity_value": True}}
-            }
-        }
-    }
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {iam_token}"
-    }
-    response = requests.post(url, headers=headers, json=body)
-    if response.status_code != 200:
-        raise Exception(f"API Error: {response.text}")
-    data = response.json()
-    return data.get('results', [{}])[0].get('generated_text', '')
+
+def generate_document(prompt, doc_type, bypass_cache=False, priority=INTERACTIVE):
+    full_prompt = build_granite_prompt(prompt)
+
+    def request_generation():
+        return llm.complete("watsonx", GRANITE_MODEL, full_prompt, GRANITE_PARAMETERS,
+                            priority=priority, extra=GRANITE_REQUEST_OPTIONS)
+
+    return cached_completion(GRANITE_MODEL, GRANITE_PARAMETERS, full_prompt, request_generation, bypass=bypass_cache or None)
+
+def generate_document_stream(prompt, doc_type):
+    return llm.stream("watsonx", GRANITE_MODEL, build_granite_prompt(prompt), GRANITE_PARAMETERS,
+                      extra=GRANITE_REQUEST_OPTIONS)
+
+CHAT_PAGE_SIZE = 20
 
 def chat_interface():
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = ConversationStore(summarize=GraniteAI.summarize_conversation)
+    conversation = st.session_state.conversation
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.messages:
+        page_count = conversation.page_count(CHAT_PAGE_SIZE)
+        page_number = page_count
+        if page_count > 1:
+            page_number = st.number_input("History page", min_value=1, max_value=page_count, value=page_count)
+        for message in conversation.page(page_number, CHAT_PAGE_SIZE):
             with st.chat_message(message["role"]):
                 st.write(message["content"])
     if prompt := st.chat_input("Ask your HR related question..."):
+        context = conversation.build_context()
         with st.chat_message("user"):
             st.write(prompt)
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        response = GraniteAI.process_chat_query(prompt)
+        conversation.append("user", prompt)
         with st.chat_message("assistant"):
-            st.write(response)
-        st.session_state.messages.append({"role": "assistant", "content": response})
+            response = st.write_stream(GraniteAI.stream_chat_query(prompt, context))
+        conversation.append("assistant", response)
+        conversation.compact()
+
+def employee_directory():
+    col1, col2 = st.columns(2)
+    with col1:
+        department = st.selectbox("Filter by Department", ["All"] + DEPARTMENTS)
+    with col2:
+        role = st.text_input("Filter by Role")
+    filters = (department, role)
+    # Stack of keyset cursors: the id each visited page started after.
+    if st.session_state.get("employee_filters") != filters:
+        st.session_state.employee_filters = filters
+        st.session_state.employee_cursors = [None]
+    cursors = st.session_state.employee_cursors
+    page = EmployeeManagement.get_employees_page(
+        after_id=cursors[-1],
+        limit=EMPLOYEE_PAGE_SIZE + 1,
+        department=None if department == "All" else department,
+        role=role or None
+    )
+    rows = page.data[:EMPLOYEE_PAGE_SIZE]
+    has_next = len(page.data) > EMPLOYEE_PAGE_SIZE
+    st.dataframe(pd.DataFrame(rows))
+    col1, col2, col3 = st.columns([1, 1, 4])
+    with col1:
+        if st.button("Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next", disabled=not has_next):
+            cursors.append(rows[-1]['id'])
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}")
+
+def batch_resume_screening():
+    job_description = st.text_area("Job Description", height=200)
+    uploaded_files = st.file_uploader("Upload Resumes (PDFs or a ZIP of PDFs)", type=['pdf', 'zip'],
+                                      accept_multiple_files=True)
+    top_n = st.number_input("Resumes to analyse with AI", min_value=0, max_value=50, value=5)
+    if not (uploaded_files and job_description.strip() and st.button("Screen Resumes")):
+        return
+    table = st.empty()
+    results = []
+    with st.spinner("Extracting and ranking resumes..."):
+        for result in screen_resumes(iter_uploaded_pdfs(uploaded_files), job_description):
+            results.append(result)
+            ranked = pd.DataFrame(results).sort_values("score", ascending=False)
+            table.dataframe(pd.DataFrame({
+                "Resume": ranked["name"],
+                "Match": (ranked["score"] * 100).round(1),
+                "Matched Terms": ranked["matched"].str.join(", "),
+                "Error": ranked["error"],
+            }), hide_index=True)
+    shortlist = [
+        result for result in sorted(results, key=lambda item: item["score"], reverse=True)
+        if not result["error"]
+    ][:top_n]
+    if not shortlist:
+        return
+    st.subheader(f"AI Analysis of Top {len(shortlist)}")
+    # Keyed by position: resumes from different folders or uploads can share a file name.
+    placeholders = []
+    for result in shortlist:
+        with st.expander(f"{result['name']} ({result['score'] * 100:.1f}% match)"):
+            placeholders.append(st.empty())
+            placeholders[-1].info("Analysing...")
+    with ThreadPoolExecutor(max_workers=RESUME_ANALYSIS_WORKERS) as executor:
+        futures = {
+            executor.submit(GraniteAI.analyze_resume_text, result['text'], job_description, BATCH): index
+            for index, result in enumerate(shortlist)
+        }
+        for future in as_completed(futures):
+            try:
+                placeholders[futures[future]].markdown(future.result())
+            except Exception as e:
+                placeholders[futures[future]].error(f"Error analysing resume: {str(e)}")
+
+def payroll_run():
+    col1, col2 = st.columns(2)
+    with col1:
+        month = st.selectbox("Payroll Month", MONTHS, index=date.today().month - 1)
+    with col2:
+        year = st.number_input("Payroll Year", min_value=2020, max_value=2100, value=date.today().year)
+    with_narrative = st.checkbox("Add AI narrative to each payslip")
+    workers = st.slider("Parallel AI requests", 1, 16, 4, disabled=not with_narrative)
+    run = PayrollRun(
+        month, year,
+        narrate=(lambda record: PayrollManagement.payslip_narrative(record, month, year, BATCH)) if with_narrative else None,
+        max_workers=workers
+    )
+    completed = run.completed()
+    if completed:
+        st.info(f"{len(completed)} payslips already generated for {month} {year}. Running again resumes the batch.")
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.button("Run Payroll")
+    with col2:
+        if st.button("Start Over", disabled=not completed):
+            run.reset()
+            st.rerun()
+    if start:
+        frame, missing = PayrollManagement.payroll_frame()
+        if missing:
+            st.warning(f"Skipping {len(missing)} employees without salary details: {', '.join(map(str, missing[:20]))}")
+        progress = st.progress(0.0, text="Generating payslips...")
+        failed = 0
+        for done, total, record in run.run(frame):
+            failed += "narrative_error" in record
+            progress.progress(done / total, text=f"{done} / {total} payslips")
+        completed = run.completed()
+        st.success(f"Payroll complete: {len(completed)} payslips")
+        if failed:
+            st.warning(f"AI narrative failed for {failed} payslips; they contain the standard details only")
+    if completed:
+        summary = pd.DataFrame(completed.values())
+        st.dataframe(summary[['employee_id', 'name', 'net_pay']], hide_index=True)
+        output = st.radio("Output", ["Single PDF", "Zip of PDFs"], horizontal=True)
+        if st.button("Prepare Download"):
+            records = list(completed.values())
+            if output == "Single PDF":
+                st.download_button("Download Payslips", render_payslips_pdf(records, month, year),
+                                   file_name=f"payslips-{year}-{month}.pdf", mime="application/pdf")
+            else:
+                st.download_button("Download Payslips", render_payslips_zip(records, month, year),
+                                   file_name=f"payslips-{year}-{month}.zip", mime="application/zip")
+
+def badge_ingestion():
+    st.caption("Upload a badge-reader log (CSV with employee_id, event, timestamp). "
+               "Swipes are queued and written in bulk every few seconds.")
+    swipe_log = st.file_uploader("Upload Swipe Log", type=['csv'])
+    if swipe_log is not None and st.button("Queue Swipes"):
+        swipes = pd.read_csv(swipe_log)
+        swipes['employee_id'] = pd.to_numeric(swipes['employee_id'], errors='coerce')
+        swipes['timestamp'] = pd.to_datetime(swipes['timestamp'], errors='coerce')
+        swipes['event'] = swipes['event'].astype(str).str.strip().str.lower()
+        known = (swipes['employee_id'].notna() & (swipes['employee_id'] % 1 == 0)
+                 & swipes['event'].isin([CLOCK_IN, CLOCK_OUT]) & swipes['timestamp'].notna())
+        accepted = 0
+        for employee_id, event, timestamp in swipes.loc[known, ['employee_id', 'event', 'timestamp']].itertuples(index=False):
+            accepted += AttendanceManagement.record_swipe(int(employee_id), event, timestamp.to_pydatetime())
+        st.success(f"Queued {accepted} swipes")
+        if accepted < known.sum():
+            st.warning(f"{known.sum() - accepted} swipes rejected: ingestion queue is full")
+        if (~known).any():
+            st.warning(f"{(~known).sum()} rows skipped (invalid employee ID, unknown event or invalid timestamp)")
+    metrics = attendance_queue().metrics()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Pending", f"{metrics['pending']} / {metrics['capacity']}")
+    col2.metric("Rows Written", metrics['rows_written'])
+    col3.metric("Coalesced", metrics['coalesced'])
+    col4.metric("Rejected", metrics['rejected'])
+    st.caption(f"Oldest pending swipe: {metrics['oldest_pending_seconds']}s · "
+               f"Flushes: {metrics['flushes']} · Failed writes: {metrics['failures']}")
+    if metrics['dead_letters']:
+        with st.expander(f"{metrics['dead_letters']} swipes could not be written"):
+            st.caption("These rows failed on every retry and were dropped from the queue.")
+            st.dataframe(pd.DataFrame(attendance_queue().dead_letters()), hide_index=True)
+
+def bulk_employee_import_export():
+    st.subheader("Import Employees")
+    st.caption(f"CSV or XLSX with columns: {', '.join(EMPLOYEE_COLUMNS)}. Existing employees are matched on email.")
+    uploaded_file = st.file_uploader("Upload Employees", type=['csv', 'xlsx'])
+    batch_size = st.number_input("Batch Size", min_value=1, max_value=5000, value=500, step=100)
+    if uploaded_file is not None and st.button("Import Employees"):
+        status = st.empty()
+        status.info("Importing...")
+        imported, rejected, failed = 0, [], []
+        started = time.perf_counter()
+        try:
+            for chunk in read_employee_chunks(uploaded_file):
+                valid, errors = validate_employees(chunk, DEPARTMENTS)
+                rejected.append(errors)
+                for report in upsert_in_batches(valid, EmployeeManagement.upsert_employees, batch_size):
+                    if report["ok"]:
+                        imported += report["rows"]
+                    else:
+                        failed.append({"Batch": report["batch"], "Rows": report["rows"], "Error": report["error"]})
+                    status.info(f"Imported {imported} rows...")
+        except ValueError as e:
+            st.error(str(e))
+        elapsed = time.perf_counter() - started
+        status.success(f"Imported {imported} rows in {elapsed:.1f}s ({imported / max(elapsed, 1e-9):,.0f} rows/s)")
+        rejected = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame()
+        if not rejected.empty:
+            st.warning(f"{len(rejected)} rows failed validation")
+            st.dataframe(rejected, hide_index=True)
+        if failed:
+            st.error(f"{len(failed)} batches failed to save")
+            st.dataframe(pd.DataFrame(failed), hide_index=True)
+    st.subheader("Export Employees")
+    if st.button("Prepare Export"):
+        rows = EmployeeManagement.iter_employees("*")
+        export = "".join(iter_csv_chunks(rows, ["id"] + EMPLOYEE_COLUMNS))
+        st.download_button("Download employees.csv", export, file_name="employees.csv", mime="text/csv")
 
 def main():
     st.title("HRMS Dashboard")
@@ -248,15 +668,22 @@ def main():
         "Select Module",
         ["Employee Management", "Salary Management", "Payroll", "Attendance", "HR Chatbot", "Sentiment Analysis", "Resume Screening"]
     )
+    with st.sidebar.expander("AI service status"):
+        iam = get_token_manager(GRANITE_API_KEY).stats()
+        st.caption(
+            f"IAM tokens: {iam['renewals']} issued, {iam['hits']} reused, {iam['failures']} failed; "
+            f"current token expires in {iam['expires_in'] // 60} min"
+        )
+        st.caption(llm.summary())
     
     if page == "Employee Management":
         st.header("Employee Management")
-        tab1, tab2, tab3 = st.tabs(["Add Employee", "View Employees", "Update/Delete"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Add Employee", "View Employees", "Update/Delete", "Bulk Import/Export"])
         with tab1:
             with st.form("new_employee"):
                 name = st.text_input("Name")
                 email = st.text_input("Email")
-                department = st.selectbox("Department", ["HR", "IT", "Finance", "Marketing"])
+                department = st.selectbox("Department", DEPARTMENTS)
                 role = st.text_input("Role")
                 hire_date = st.date_input("Hire Date")
                 if st.form_submit_button("Add Employee"):
@@ -269,39 +696,52 @@ def main():
                     })
                     st.success("Employee added successfully!")
         with tab2:
-            employees = EmployeeManagement.get_employees()
-            st.dataframe(pd.DataFrame(employees.data))
+            employee_directory()
         with tab3:
             employee_id = st.number_input("Employee ID", min_value=1)
             if st.button("Delete Employee"):
                 EmployeeManagement.delete_employee(employee_id)
                 st.success("Employee deleted successfully!")
+        with tab4:
+            bulk_employee_import_export()
     
     elif page == "Payroll":
         st.header("Payroll Management")
-        employee_id = st.number_input("Employee ID", min_value=1)
-        month = st.selectbox("Month", ["January", "February", "March", "April", "May", "June",
-                                     "July", "August", "September", "October", "November", "December"])
-        year = st.number_input("Year", min_value=2020, max_value=2025, value=2024)
-        if st.button("Generate Payslip"):
-            try:
-                payslip = PayrollManagement.generate_payslip(employee_id, month, year)
-                st.text_area("Generated Payslip", payslip, height=300)
-            except ValueError as e:
-                st.error(str(e))
-            except Exception as e:
-                st.error("An error occurred while generating the payslip")
+        tab1, tab2 = st.tabs(["Single Payslip", "Payroll Run"])
+        with tab1:
+            employee_id = st.number_input("Employee ID", min_value=1)
+            month = st.selectbox("Month", MONTHS)
+            year = st.number_input("Year", min_value=2020, max_value=2025, value=2024)
+            enrich = st.checkbox("Add AI narrative")
+            if st.button("Generate Payslip"):
+                try:
+                    payslip = PayrollManagement.generate_payslip(employee_id, month, year, enrich=enrich)
+                    st.markdown(render_payslip_html(payslip, month, year), unsafe_allow_html=True)
+                    st.download_button(
+                        "Download PDF",
+                        render_payslip_pdf(payslip, month, year),
+                        file_name=f"payslip-{employee_id}-{year}-{month}.pdf",
+                        mime="application/pdf"
+                    )
+                except ValueError as e:
+                    st.error(str(e))
+                except Exception as e:
+                    st.error("An error occurred while generating the payslip")
+        with tab2:
+            payroll_run()
     
     elif page == "Attendance":
         st.header("Attendance Management")
-        tab1, tab2 = st.tabs(["Clock In/Out", "View Attendance"])
+        tab1, tab2, tab3 = st.tabs(["Clock In/Out", "View Attendance", "Badge Ingestion"])
         with tab1:
             col1, col2 = st.columns(2)
             with col1:
                 employee_id = st.number_input("Employee ID", min_value=1)
                 if st.button("Clock In"):
-                    AttendanceManagement.clock_in(employee_id)
-                    st.success("Clocked in successfully!")
+                    if AttendanceManagement.clock_in(employee_id) is None:
+                        st.info("Already clocked in today; the earlier clock-in is kept.")
+                    else:
+                        st.success("Clocked in successfully!")
             with col2:
                 if st.button("Clock Out"):
                     AttendanceManagement.clock_out(employee_id)
@@ -309,40 +749,48 @@ def main():
         with tab2:
             col1, col2, col3 = st.columns(3)
             with col1:
-                employees = EmployeeManagement.get_employees()
-                employee_df = pd.DataFrame(employees.data)
-                if not employee_df.empty:
-                    employee_dict = dict(zip(employee_df['id'], employee_df['name']))
-                    employee_dict[0] = "All Employees"
-                    selected_employee = st.selectbox(
-                        "Select Employee",
-                        options=[0] + list(employee_df['id']),
-                        format_func=lambda x: employee_dict[x]
-                    )
+                search = st.text_input("Search Employee", placeholder="Name or ID")
+                options, employee_dict = employee_options(search, include_all=True)
+                selected_employee = st.selectbox(
+                    "Select Employee",
+                    options=options,
+                    format_func=lambda x: employee_dict[x]
+                )
             with col2:
                 start_date = st.date_input("Start Date", value=date.today().replace(day=1))
             with col3:
                 end_date = st.date_input("End Date", value=date.today())
+            view = st.radio("View", ["Summary", "Records"], horizontal=True)
             try:
-                attendance = AttendanceManagement.get_attendance(
-                    employee_id=selected_employee if selected_employee != 0 else None,
-                    start_date=start_date.isoformat(),
-                    end_date=end_date.isoformat()
-                )
-                if attendance.data:
-                    df = pd.DataFrame(attendance.data)
-                    df['employee_name'] = df['employees'].apply(lambda x: x['name'])
-                    display_df = pd.DataFrame()
-                    display_df['Employee ID'] = df['employee_id']
-                    display_df['Employee Name'] = df['employee_name']
-                    display_df['Date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-                    display_df['Clock In'] = pd.to_datetime(df['clock_in']).dt.strftime('%I:%M %p')
-                    display_df['Clock Out'] = pd.to_datetime(df['clock_out']).dt.strftime('%I:%M %p')
-                    st.dataframe(display_df)
+                if view == "Summary":
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        period = st.selectbox("Period", ["M", "W", "D"],
+                                              format_func={"D": "Daily", "W": "Weekly", "M": "Monthly"}.get)
+                    with col2:
+                        group_by = st.selectbox("Group By", ["employee", "department"], format_func=str.capitalize)
+                    summary = attendance_summary().report(
+                        start_date, end_date, period, by=group_by,
+                        employee_id=selected_employee if selected_employee != 0 else None
+                    )
+                    if not summary.empty:
+                        st.dataframe(summary, hide_index=True)
+                    else:
+                        st.info("No attendance records found for the selected criteria")
                 else:
-                    st.info("No attendance records found for the selected criteria")
+                    attendance = AttendanceManagement.get_attendance(
+                        employee_id=selected_employee if selected_employee != 0 else None,
+                        start_date=start_date.isoformat(),
+                        end_date=end_date.isoformat()
+                    )
+                    if attendance.data:
+                        st.dataframe(attendance_display_frame(attendance.data))
+                    else:
+                        st.info("No attendance records found for the selected criteria")
             except Exception as e:
                 st.error(f"Error fetching attendance data: {str(e)}")
+        with tab3:
+            badge_ingestion()
     
     elif page == "HR Chatbot":
         st.header("HR Chatbot")
@@ -358,30 +806,33 @@ def main():
     
     elif page == "Resume Screening":
         st.header("Resume Screening")
-        uploaded_file = st.file_uploader("Upload Resume (PDF)", type=['pdf'])
-        if uploaded_file is not None:
-            try:
-                results = GraniteAI.parse_resume(uploaded_file)
-                if results and not results.startswith("Error"):
-                    st.write("Resume Analysis Results:")
-                    st.write(results)
-                else:
-                    st.error(results)
-            except Exception as e:
-                st.error(f"Error processing file: {str(e)}")
+        mode = st.radio("Mode", ["Single Resume", "Batch Screening"], horizontal=True)
+        if mode == "Batch Screening":
+            batch_resume_screening()
+        else:
+            uploaded_file = st.file_uploader("Upload Resume (PDF)", type=['pdf'])
+            if uploaded_file is not None:
+                try:
+                    results = GraniteAI.parse_resume(uploaded_file)
+                    if results and not results.startswith("Error"):
+                        st.write("Resume Analysis Results:")
+                        st.write(results)
+                    else:
+                        st.error(results)
+                except Exception as e:
+                    st.error(f"Error processing file: {str(e)}")
     
     elif page == "Salary Management":
         st.header("Salary Management")
         tab1, tab2 = st.tabs(["Add/Update Salary", "View Salary Details"])
         with tab1:
-            employees = EmployeeManagement.get_employees()
-            employee_df = pd.DataFrame(employees.data)
-            if not employee_df.empty:
-                employee_dict = dict(zip(employee_df['id'], employee_df['name']))
+            if len(employee_index()):
+                search = st.text_input("Search Employee", placeholder="Name or ID")
+                options, employee_dict = employee_options(search)
                 with st.form("salary_form"):
                     selected_employee = st.selectbox(
                         "Select Employee",
-                        options=employee_df['id'],
+                        options=options,
                         format_func=lambda x: f"{x} - {employee_dict[x]}"
                     )
                     basic_pay = st.number_input("Basic Pay", min_value=0.0, value=0.0, step=1000.0)
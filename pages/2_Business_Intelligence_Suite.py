@@ -3,10 +3,6 @@ import os
 from dotenv import load_dotenv
 import logging
 import time
-from groq import Groq
-import docx
-import PyPDF2
-import pptx
 from pathlib import Path
 import pandas as pd
 import plotly.express as px
@@ -15,12 +11,20 @@ from datetime import datetime
 import json
 import yaml
 import io
+import itertools
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 import markdown
 from PIL import Image
 import pdfkit
 import imgkit
+from utils.chunking import iter_chunks, map_chunks, reduce_hierarchically
+from utils.conversation import estimate_tokens
+from utils.doc_extract import iter_document_text
+from utils.llm_cache import cached_completion, cached_stream
+from utils.llm_gateway import BATCH, INTERACTIVE, get_gateway
+from utils.llm_stream import StreamMetrics, render_stream
+from utils.text_cache import get_text_cache
 
 # Configure page settings with dark mode
 st.set_page_config(
@@ -40,9 +44,49 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize Groq client and load environment variables
+# Load environment variables; Groq calls go through the shared, rate-limited gateway
 load_dotenv()
-client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+llm = get_gateway()
+GROQ_MODEL = "llama3-70b-8192"
+# llama3-70b-8192 has an 8k context; leave room for the prompt and the completion.
+SINGLE_PASS_TOKENS = 5000
+CHUNK_TOKENS = 3000
+CHUNK_SUMMARY_TOKENS = 400
+CHUNK_WORKERS = 4
+# Extraction stops after this many characters (~500k tokens); far beyond what map-reduce is useful for.
+MAX_DOCUMENT_CHARS = int(os.getenv('MAX_DOCUMENT_CHARS', 2_000_000))
+
+def groq_completion(prompt, max_tokens=1500, temperature=0.3, priority=INTERACTIVE, bypass_cache=None):
+    params = {"temperature": temperature, "max_tokens": max_tokens}
+
+    def request_completion():
+        return llm.complete("groq", GROQ_MODEL, prompt, params, priority=priority)
+
+    return cached_completion(GROQ_MODEL, params, prompt, request_completion, bypass=bypass_cache)
+
+def groq_completion_stream(prompt, max_tokens=1500, temperature=0.3, priority=INTERACTIVE, bypass_cache=None):
+    """Yield completion text as Groq streams it; shares cache entries with ``groq_completion``."""
+    params = {"temperature": temperature, "max_tokens": max_tokens}
+
+    def request_stream():
+        return llm.stream("groq", GROQ_MODEL, prompt, params, priority=priority)
+
+    return cached_stream(GROQ_MODEL, params, prompt, request_stream, bypass=bypass_cache)
+
+def show_streamed(deltas, template="{}", unsafe_allow_html=False):
+    """Render streamed markdown as it arrives, then report latency; returns the full text."""
+    placeholder = st.empty()
+    metrics = StreamMetrics()
+    text = render_stream(
+        deltas,
+        lambda partial: placeholder.markdown(template.format(partial), unsafe_allow_html=unsafe_allow_html),
+        metrics
+    )
+    summary = metrics.summary()
+    if summary:
+        st.caption(summary)
+        logging.info("Groq stream: %s (%d chunks)", summary, metrics.chunks)
+    return text
 
 class BusinessAnalyzer:
     @staticmethod
@@ -78,52 +122,69 @@ class BusinessAnalyzer:
         3. Potential risks and opportunities
         4. Strategic action items
         """
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-70b-8192",
-            temperature=0.3,
-            max_tokens=1500
-        )
-        return response.choices[0].message.content
+        return groq_completion_stream(prompt)
+
+def summarize_chunk(chunk):
+    # Independent of the processing type, so its cached result is reused by every type.
+    prompt = f"""Extract the substantive content of this document section as concise notes.
+    Keep facts, figures, names, decisions, deadlines and owners. Do not add commentary.
+
+    {chunk}"""
+    return groq_completion(prompt, max_tokens=CHUNK_SUMMARY_TOKENS, priority=BATCH)
 
-def process_uploaded_file(uploaded_file):
+def combine_chunk_notes(notes):
+    prompt = f"""Merge these consecutive sets of notes from one document into a single set of concise notes.
+    Keep facts, figures, names, decisions, deadlines and owners; remove repetition.
+
+    {chr(10).join(notes)}"""
+    return groq_completion(prompt, max_tokens=CHUNK_SUMMARY_TOKENS * 2, priority=BATCH)
+
+def condense_document(data, file_extension, on_progress=None):
+    """Text for the final prompt: the document itself if it fits, otherwise its map-reduced notes.
+
+    Pages stream from the extractor straight into the chunker and the map
+    step, so a large document is never held as one string.
+    ``on_progress(done)`` is called from the calling thread after each chunk.
+    """
+    pages = iter_document_text(data, file_extension, max_chars=MAX_DOCUMENT_CHARS)
+    head, head_tokens = [], 0
+    for page in pages:
+        head.append(page)
+        head_tokens += estimate_tokens(page)
+        if head_tokens > SINGLE_PASS_TOKENS:
+            break
+    else:
+        return '\n'.join(head)
+    chunks = iter_chunks(itertools.chain(head, pages), max_tokens=CHUNK_TOKENS)
+    notes = {}
+    for done, (index, chunk_notes) in enumerate(map_chunks(chunks, summarize_chunk, CHUNK_WORKERS), start=1):
+        notes[index] = chunk_notes
+        if on_progress:
+            on_progress(done)
+    notes = reduce_hierarchically([notes[index] for index in sorted(notes)], combine_chunk_notes, SINGLE_PASS_TOKENS, CHUNK_WORKERS)
+    return "\n\n".join(notes)
+
+def process_uploaded_file(uploaded_file, on_progress=None):
     file_extension = Path(uploaded_file.name).suffix.lower()
     try:
-        if file_extension == '.txt':
-            return uploaded_file.getvalue().decode()
-        elif file_extension == '.docx':
-            doc = docx.Document(uploaded_file)
-            return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-        elif file_extension == '.pdf':
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            return '\n'.join([page.extract_text() for page in pdf_reader.pages])
-        elif file_extension == '.pptx':
-            prs = pptx.Presentation(uploaded_file)
-            text = []
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text.append(shape.text)
-            return '\n'.join(text)
-        else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+        # Keyed on the file bytes, so re-processing an upload skips parsing and the map step.
+        return get_text_cache().get_or_extract(
+            uploaded_file.getvalue(),
+            f"bi-suite{file_extension}:condensed",
+            lambda data: condense_document(data, file_extension, on_progress)
+        )
     except Exception as e:
         raise Exception(f"Error processing file: {str(e)}")
 
 def process_document(text_content, process_type):
+    """Run ``process_type`` over text from ``process_uploaded_file`` (already condensed to fit one prompt)."""
     try:
         prompt = f"""Process the following document content based on {process_type}:
         
         {text_content}
         
         Provide a detailed {process_type} focusing on the main points and key takeaways."""
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-70b-8192",
-            temperature=0.3,
-            max_tokens=1500
-        )
-        return response.choices[0].message.content
+        return groq_completion(prompt)
     except Exception as e:
         raise Exception(f"Error processing document: {str(e)}")
 
@@ -187,13 +248,12 @@ def display_business_analytics():
                     <h2>{metrics["roi"]:.2f}%</h2>
                 </div>
                 """, unsafe_allow_html=True)
-            insights = BusinessAnalyzer.generate_business_insights(metrics, business_type)
             st.subheader("Business Insights")
-            st.markdown(f"""
-            <div class="card">
-                {insights}
-            </div>
-            """, unsafe_allow_html=True)
+            show_streamed(
+                BusinessAnalyzer.generate_business_insights(metrics, business_type),
+                template='<div class="card">\n\n{}\n\n</div>',
+                unsafe_allow_html=True
+            )
             fig = go.Figure()
             fig.add_trace(go.Indicator(
                 mode="gauge+number",
@@ -220,14 +280,19 @@ def display_document_processing():
     )
     if uploaded_file:
         try:
-            text_content = process_uploaded_file(uploaded_file)
-            st.success(f"Successfully processed {uploaded_file.name}")
+            st.success(f"Uploaded {uploaded_file.name}")
             process_type = st.selectbox(
                 "Select Processing Type",
                 ["Smart Summary", "Key Points Extraction", "Action Items", "Full Analysis"]
             )
             if st.button("Process Document"):
                 with st.spinner("Processing document..."):
+                    progress = st.empty()
+                    text_content = process_uploaded_file(
+                        uploaded_file,
+                        on_progress=lambda done: progress.caption(f"Summarised {done} sections")
+                    )
+                    progress.empty()
                     summary = process_document(text_content, process_type)
                     st.markdown(f"""
                     <div class="card">
@@ -273,37 +338,35 @@ def display_contract_generation():
             )
             requirements = [custom_requirements]
     if st.button("Generate Contract"):
-        with st.spinner("Generating contract..."):
-            try:
-                requirements_text = "\n".join(filter(None, requirements))
-                contract_gen = ContractGenerator(client)
-                contract_content = contract_gen.generate_contract_template(
-                    contract_type, requirements_text
+        try:
+            requirements_text = "\n".join(filter(None, requirements))
+            contract_gen = ContractGenerator()
+            st.markdown("""
+            <div class="card">
+                <h3>Contract Preview</h3>
+            </div>
+            """, unsafe_allow_html=True)
+            contract_content = show_streamed(
+                contract_gen.generate_contract_template(contract_type, requirements_text)
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                pdf_data = contract_gen.create_pdf(contract_content)
+                st.download_button(
+                    "Download as PDF",
+                    pdf_data,
+                    file_name="contract.pdf",
+                    mime="application/pdf"
                 )
-                st.markdown("""
-                <div class="card">
-                    <h3>Contract Preview</h3>
-                </div>
-                """, unsafe_allow_html=True)
-                st.markdown(contract_content)
-                col1, col2 = st.columns(2)
-                with col1:
-                    pdf_data = contract_gen.create_pdf(contract_content)
-                    st.download_button(
-                        "Download as PDF",
-                        pdf_data,
-                        file_name="contract.pdf",
-                        mime="application/pdf"
-                    )
-                with col2:
-                    st.download_button(
-                        "Download as Text",
-                        contract_content,
-                        file_name="contract.md",
-                        mime="text/markdown"
-                    )
-            except Exception as e:
-                st.error(f"Error generating contract: {str(e)}")
+            with col2:
+                st.download_button(
+                    "Download as Text",
+                    contract_content,
+                    file_name="contract.md",
+                    mime="text/markdown"
+                )
+        except Exception as e:
+            st.error(f"Error generating contract: {str(e)}")
 
 def display_market_analysis():
     st.title("Market Analysis & Trends")
@@ -327,9 +390,7 @@ def display_market_analysis():
             ["Market Leader", "Strong Competitor", "Growing Player", "New Entrant"]
         )
         if st.button("Generate Competitor Analysis"):
-            with st.spinner("Analyzing competitors..."):
-                analysis = generate_competitor_analysis(competitors, market_position, industry)
-                display_analysis_results(analysis)
+            display_analysis_results(generate_competitor_analysis(competitors, market_position, industry))
     elif analysis_type == "Market Trends":
         timeframe = st.selectbox("Timeframe", ["Short-term", "Medium-term", "Long-term"])
         focus_areas = st.multiselect(
@@ -338,20 +399,16 @@ def display_market_analysis():
              "Regulatory Changes", "Market Size", "Growth Potential"]
         )
         if st.button("Analyze Market Trends"):
-            with st.spinner("Analyzing market trends..."):
-                trends = generate_market_trends(industry, timeframe, focus_areas)
-                display_analysis_results(trends)
+            display_analysis_results(generate_market_trends(industry, timeframe, focus_areas))
     elif analysis_type == "SWOT Analysis":
         strengths = st.text_area("List your strengths")
         weaknesses = st.text_area("List your weaknesses")
         opportunities = st.text_area("List market opportunities")
         threats = st.text_area("List potential threats")
         if st.button("Generate SWOT Analysis"):
-            with st.spinner("Generating SWOT analysis..."):
-                swot = generate_swot_analysis(
-                    strengths, weaknesses, opportunities, threats, industry
-                )
-                display_analysis_results(swot)
+            display_analysis_results(generate_swot_analysis(
+                strengths, weaknesses, opportunities, threats, industry
+            ))
     elif analysis_type == "Risk Assessment":
         risk_factors = st.multiselect(
             "Risk Factors to Analyze",
@@ -359,9 +416,7 @@ def display_market_analysis():
              "Strategic Risk", "Compliance Risk"]
         )
         if st.button("Generate Risk Assessment"):
-            with st.spinner("Assessing risks..."):
-                risks = generate_risk_assessment(risk_factors, industry)
-                display_analysis_results(risks)
+            display_analysis_results(generate_risk_assessment(risk_factors, industry))
 
 def generate_competitor_analysis(competitors, market_position, industry):
     prompt = f"""Analyze the competitive landscape for a {market_position} in the {industry} industry.
@@ -375,13 +430,7 @@ def generate_competitor_analysis(competitors, market_position, industry):
     3. Competitive advantages and disadvantages
     4. Recommendations for market positioning
     """
-    response = client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama3-70b-8192",
-        temperature=0.3,
-        max_tokens=1500
-    )
-    return response.choices[0].message.content
+    return groq_completion_stream(prompt)
 
 def generate_market_trends(industry, timeframe, focus_areas):
     prompt = f"""Analyze market trends for the {industry} industry over a {timeframe} period.
@@ -395,13 +444,7 @@ def generate_market_trends(industry, timeframe, focus_areas):
     3. Impact analysis
     4. Strategic recommendations
     """
-    response = client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama3-70b-8192",
-        temperature=0.3,
-        max_tokens=1500
-    )
-    return response.choices[0].message.content
+    return groq_completion_stream(prompt)
 
 def generate_swot_analysis(strengths, weaknesses, opportunities, threats, industry):
     prompt = f"""Perform a SWOT analysis for a company in the {industry} industry.
@@ -423,13 +466,7 @@ def generate_swot_analysis(strengths, weaknesses, opportunities, threats, indust
     2. Strategic implications
     3. Recommended actions
     """
-    response = client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama3-70b-8192",
-        temperature=0.3,
-        max_tokens=1500
-    )
-    return response.choices[0].message.content
+    return groq_completion_stream(prompt)
 
 def generate_risk_assessment(risk_factors, industry):
     prompt = f"""Assess risks for a company in the {industry} industry.
@@ -443,21 +480,15 @@ def generate_risk_assessment(risk_factors, industry):
     3. Monitoring recommendations
     4. Contingency planning
     """
-    response = client.chat.completions.create(
-        messages=[{"role": "user", "content": prompt}],
-        model="llama3-70b-8192",
-        temperature=0.3,
-        max_tokens=1500
-    )
-    return response.choices[0].message.content
+    return groq_completion_stream(prompt)
 
-def display_analysis_results(analysis):
+def display_analysis_results(analysis_stream):
     st.markdown("""
     <div class="card">
         <h3>Analysis Results</h3>
     </div>
     """, unsafe_allow_html=True)
-    st.markdown(analysis)
+    analysis = show_streamed(analysis_stream)
     st.download_button(
         "Download Analysis",
         analysis,
@@ -466,9 +497,6 @@ def display_analysis_results(analysis):
     )
 
 class ContractGenerator:
-    def __init__(self, client):
-        self.client = client
-
     def generate_contract_template(self, contract_type, requirements):
         prompt = f"""Generate a professional {contract_type} contract with the following requirements:
         {requirements}
@@ -483,13 +511,7 @@ class ContractGenerator:
         7. Signature blocks
         
         Format in proper legal contract style with clear sections and numbering."""
-        response = self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-70b-8192",
-            temperature=0.3,
-            max_tokens=2000
-        )
-        return response.choices[0].message.content
+        return groq_completion_stream(prompt, max_tokens=2000)
 
     def create_pdf(self, content):
         try:
@@ -549,6 +571,8 @@ def main():
         if st.sidebar.button("📄 Documents"):
             selected_page = "Document Processing"
         st.sidebar.markdown("---")
+        with st.sidebar.expander("AI service status"):
+            st.caption(llm.summary())
     if selected_page == "Business Analytics":
         display_business_analytics()
     elif selected_page == "Document Processing":
@@ -4,24 +4,40 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from dotenv import load_dotenv
-import os
-from groq import Groq
 import json
-from datetime import datetime, timedelta
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
 import requests
-import yfinance as yf
+from utils.cache_regions import all_regions, get_region
+from utils.llm_cache import cached_completion, in_flight_stats
+from utils.llm_gateway import get_gateway
+from utils.market_data import configured_tickers
+from utils.price_store import get_price_store
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
 
-# Initialize Groq client
-client = Groq(api_key=groq_api_key)
+# Groq calls go through the shared, rate-limited gateway
+llm = get_gateway()
+
+# Process-wide cache regions, refreshed independently from the sidebar
+MARKET_DATA_CACHE = get_region("market_data", ttl=3600)
+PRICING_DATA_CACHE = get_region("pricing_data", ttl=1800)
+AI_ANALYSIS_CACHE = get_region("ai_analyses", ttl=3600, max_entries=128)
+CACHE_REGION_LABELS = {
+    "market_data": "Market data",
+    "pricing_data": "Pricing data",
+    "ai_analyses": "AI analyses",
+}
 
 if 'competitor_data' not in st.session_state:
     st.session_state.competitor_data = pd.DataFrame(columns=['Name', 'Product', 'Price', 'Market_Share', 'Date_Added'])
 if 'customer_data' not in st.session_state:
     st.session_state.customer_data = pd.DataFrame()
+if 'ai_analysis_memo' not in st.session_state:
+    st.session_state.ai_analysis_memo = {}
 
 # Configure dark mode settings
 st.set_page_config(page_title="E-commerce Analytics Dashboard", layout="wide", initial_sidebar_state="expanded")
@@ -35,23 +51,16 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=3600)
-def fetch_market_data():
-    tickers = ["AMZN", "SHOP", "ETSY", "WMT", "TGT"]
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
-    market_data = pd.DataFrame()
-    for ticker in tickers:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(start=start_date, end=end_date)
-        if market_data.empty:
-            market_data = hist['Close'].rename(ticker)
-        else:
-            market_data = pd.concat([market_data, hist['Close'].rename(ticker)], axis=1)
+@MARKET_DATA_CACHE.cached
+def fetch_market_data(tickers=None, lookback_days=30):
+    tickers = tuple(tickers or configured_tickers())
+    store = get_price_store()
+    store.sync(tickers, lookback_days)
+    market_data = store.window(tickers, lookback_days)
     market_data['Market_Index'] = market_data.mean(axis=1)
     return market_data
 
-@st.cache_data(ttl=1800)
+@PRICING_DATA_CACHE.cached
 def fetch_pricing_data():
     categories = ['Electronics', 'Fashion', 'Home', 'Beauty', 'Sports']
     pricing_data = []
@@ -83,23 +92,66 @@ def fetch_category_products(category):
         })
     return products
 
-def get_ai_analysis(prompt, context=""):
-    try:
-        full_prompt = f"""Context: {context}
+GROQ_MODEL = "llama3-70b-8192"
+AI_ANALYSIS_PARAMS = {"temperature": 0.7, "max_tokens": 500}
+AI_UNAVAILABLE_MESSAGE = "AI analysis temporarily unavailable. Please try again later."
+REPORT_MAX_WORKERS = 3
+REPORT_SECTION_TIMEOUT = 60
+
+def request_ai_analysis(prompt, context="", bypass_cache=None):
+    """Call Groq (through the shared cache) and raise on failure.
+
+    Safe to run off the script thread: it never touches ``st``.
+    """
+    key = (prompt, context)
+    if not bypass_cache:
+        found, analysis = AI_ANALYSIS_CACHE.get(key)
+        if found:
+            return analysis
+    full_prompt = f"""Context: {context}
 
         Task: {prompt}
 
         Please provide a detailed analysis focusing on actionable insights."""
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": full_prompt}],
-            temperature=0.7,
-            max_tokens=500
-        )
-        return completion.choices[0].message.content
+
+    def request_analysis():
+        return llm.complete("groq", GROQ_MODEL, full_prompt, AI_ANALYSIS_PARAMS)
+
+    # After a manual refresh, ignore disk-cached answers from before it.
+    analysis = cached_completion(
+        GROQ_MODEL, AI_ANALYSIS_PARAMS, full_prompt, request_analysis,
+        bypass=bypass_cache, not_before=AI_ANALYSIS_CACHE.invalidated_at
+    )
+    AI_ANALYSIS_CACHE.set(key, analysis)
+    return analysis
+
+def get_ai_analysis(prompt, context="", bypass_cache=None):
+    try:
+        return request_ai_analysis(prompt, context, bypass_cache)
     except Exception as e:
         st.error(f"Error in AI analysis: {str(e)}")
-        return "AI analysis temporarily unavailable. Please try again later."
+        return AI_UNAVAILABLE_MESSAGE
+
+def frame_fingerprint(df):
+    values = pd.util.hash_pandas_object(df, index=True).values.tobytes()
+    columns = "|".join(map(str, df.columns)).encode()
+    return hashlib.sha256(columns + values).hexdigest()
+
+def memoized_ai_analysis(section, prompt, data, build_context):
+    """Run get_ai_analysis only when ``data`` changed since this session last analysed it.
+
+    ``build_context`` is called with ``data`` on a miss, so reruns with unchanged
+    input skip both the prompt formatting and the Groq request.
+    """
+    memo = st.session_state.ai_analysis_memo
+    fingerprint = (prompt, frame_fingerprint(data), AI_ANALYSIS_CACHE.invalidated_at)
+    entry = memo.get(section)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
+    analysis = get_ai_analysis(prompt, build_context(data))
+    if analysis != AI_UNAVAILABLE_MESSAGE:
+        memo[section] = (fingerprint, analysis)
+    return analysis
 
 def analyze_market_trends():
     st.subheader("📈 Market Trends Analysis")
@@ -115,9 +167,11 @@ def analyze_market_trends():
             fig = px.box(returns, title='Daily Returns Distribution', template="plotly_dark")
             fig.update_layout(height=400)
             st.plotly_chart(fig, use_container_width=True)
-        analysis = get_ai_analysis(
+        analysis = memoized_ai_analysis(
+            "market_trends",
             "Analyze the e-commerce sector trends and provide strategic insights",
-            f"Market data for last 30 days shows following trends:\n{market_data.describe().to_string()}"
+            market_data,
+            lambda df: f"Market data for last 30 days shows following trends:\n{df.describe().to_string()}"
         )
         st.info("💡 AI Analysis\n\n" + analysis)
 
@@ -136,9 +190,11 @@ def optimize_pricing():
             fig = px.scatter(category_data, x='Current_Price', y='Margin', template="plotly_dark",
                              title='Price-Margin Relationship', size='Current_Price')
             st.plotly_chart(fig, use_container_width=True)
-        analysis = get_ai_analysis(
+        analysis = memoized_ai_analysis(
+            f"pricing:{selected_category}",
             f"Provide pricing optimization recommendations for {selected_category} category",
-            f"Current pricing data:\n{category_data.to_string()}"
+            category_data,
+            lambda df: f"Current pricing data:\n{df.to_string()}"
         )
         st.info("💡 Pricing Recommendations\n\n" + analysis)
 
@@ -218,9 +274,11 @@ def add_competitor_product():
             fig = px.bar(st.session_state.competitor_data, x='Name', y='Price',
                          title='Price Comparison', template="plotly_dark")
             st.plotly_chart(fig, use_container_width=True)
-        analysis = get_ai_analysis(
+        analysis = memoized_ai_analysis(
+            "competitors",
             "Analyze competitor positioning and provide strategic recommendations",
-            f"Competitor data:\n{st.session_state.competitor_data.to_string()}"
+            st.session_state.competitor_data,
+            lambda df: f"Competitor data:\n{df.to_string()}"
         )
         st.info("💡 Competitive Analysis\n\n" + analysis)
 
@@ -244,53 +302,89 @@ def analyze_customer_segments():
                          size='CLV', text=segment_df.index,
                          title='Segment Analysis')
         st.plotly_chart(fig, use_container_width=True)
-    analysis = get_ai_analysis(
+    analysis = memoized_ai_analysis(
+        "customer_segments",
         "Analyze customer segments and provide targeting recommendations",
-        f"Segment data:\n{segment_df.to_string()}"
+        segment_df,
+        lambda df: f"Segment data:\n{df.to_string()}"
     )
     st.info("💡 Segment Insights\n\n" + analysis)
 
+def generate_report_sections(sections, max_workers=REPORT_MAX_WORKERS, timeout=REPORT_SECTION_TIMEOUT):
+    """Generate report sections concurrently and yield ``(title, text, error)`` as each finishes.
+
+    ``sections`` maps a title to a ``(prompt, context)`` pair. Sections still
+    running when ``timeout`` seconds have passed are yielded with a timeout error
+    so one slow request cannot hold up the rest of the report.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {
+        executor.submit(request_ai_analysis, prompt, context): title
+        for title, (prompt, context) in sections.items()
+    }
+    deadline = time.monotonic() + timeout
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        for future in pending:
+            yield futures[future], None, TimeoutError(f"timed out after {timeout}s")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def generate_comprehensive_report():
     st.subheader("📊 Comprehensive Report")
     report_date = datetime.now().strftime("%Y-%m-%d")
-    with st.spinner("Generating comprehensive report..."):
-        market_data = fetch_market_data()
-        pricing_data = fetch_pricing_data()
-        market_analysis = get_ai_analysis(
+    market_data = fetch_market_data()
+    pricing_data = fetch_pricing_data()
+    sections = {
+        "1. Market Analysis": (
             "Generate comprehensive market analysis section",
             f"Market data:\n{market_data.describe().to_string()}"
-        )
-        pricing_analysis = get_ai_analysis(
+        ),
+        "2. Pricing Strategy": (
             "Generate pricing strategy analysis section",
             f"Pricing data:\n{pricing_data.describe().to_string()}"
+        ),
+    }
+    if not st.session_state.competitor_data.empty:
+        sections["3. Competitor Analysis"] = (
+            "Generate competitor analysis section",
+            f"Competitor data:\n{st.session_state.competitor_data.to_string()}"
         )
-        if not st.session_state.competitor_data.empty:
-            competitor_analysis = get_ai_analysis(
-                "Generate competitor analysis section",
-                f"Competitor data:\n{st.session_state.competitor_data.to_string()}"
-            )
+    st.markdown(f"""
+    # E-commerce Analytics Report
+    **Generated on: {report_date}**
+    """)
+    placeholders = {}
+    for title in ["1. Market Analysis", "2. Pricing Strategy", "3. Competitor Analysis"]:
+        st.markdown(f"## {title}")
+        placeholders[title] = st.empty()
+        if title in sections:
+            placeholders[title].info("Generating section...")
         else:
-            competitor_analysis = "No competitor data available for analysis."
-        st.markdown(f"""
-        # E-commerce Analytics Report
-        **Generated on: {report_date}**
-        
-        ## 1. Market Analysis
-        {market_analysis}
-        
-        ## 2. Pricing Strategy
-        {pricing_analysis}
-        
-        ## 3. Competitor Analysis
-        {competitor_analysis}
-        """)
-        col1, col2 = st.columns(2)
-        with col1:
-            fig = px.line(market_data['Market_Index'], title='Market Index Trend', template="plotly_dark")
-            st.plotly_chart(fig, use_container_width=True)
-        with col2:
-            fig = px.box(pricing_data, x='Category', y='Margin', title='Margin Distribution by Category', template="plotly_dark")
-            st.plotly_chart(fig, use_container_width=True)
+            placeholders[title].markdown("No competitor data available for analysis.")
+    with st.spinner("Generating comprehensive report..."):
+        for title, analysis, error in generate_report_sections(sections):
+            if error is not None:
+                placeholders[title].error(f"Error in AI analysis: {str(error)}")
+            else:
+                placeholders[title].markdown(analysis)
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.line(market_data['Market_Index'], title='Market Index Trend', template="plotly_dark")
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = px.box(pricing_data, x='Category', y='Margin', title='Margin Distribution by Category', template="plotly_dark")
+        st.plotly_chart(fig, use_container_width=True)
 
 st.sidebar.title("E-commerce Analytics")
 page = st.sidebar.selectbox(
@@ -298,10 +392,26 @@ page = st.sidebar.selectbox(
     ["Market Trends", "Price Optimization", "Purchase Probability", "Competitor Analysis", "Customer Segments", "Generate Report"]
 )
 
+refresh_regions = st.sidebar.multiselect(
+    "Data to refresh",
+    list(CACHE_REGION_LABELS),
+    default=["market_data", "pricing_data"],
+    format_func=CACHE_REGION_LABELS.get
+)
 if st.sidebar.button("🔄 Refresh Data"):
-    st.cache_data.clear()
+    for region_name in refresh_regions:
+        get_region(region_name).invalidate()
     st.success("Data refreshed successfully!")
 
+with st.sidebar.expander("Cache status"):
+    cache_stats = pd.DataFrame([region.stats() for region in all_regions()])
+    if not cache_stats.empty:
+        cache_stats['last_invalidated'] = pd.to_datetime(cache_stats['last_invalidated'], unit='s')
+    st.dataframe(cache_stats, hide_index=True)
+    llm_requests = in_flight_stats()
+    st.caption(llm.summary())
+    st.caption(f"LLM requests: {llm_requests['calls']} sent, {llm_requests['coalesced']} shared with an identical request already in flight")
+
 st.sidebar.markdown("""
 ---
 ### Data Sources
@@ -0,0 +1 @@
+"""Shared helpers used by the BizNexus dashboard pages."""
@@ -0,0 +1,173 @@
+"""Coalescing ingestion queue for badge-reader attendance events.
+
+Swipes are buffered in memory and written as bulk upserts on a short flush
+interval. Events are coalesced per ``(employee_id, date)``: the earliest
+clock-in and the latest clock-out win, so replays and double swipes are
+idempotent. ``metrics()`` exposes queue depth and rejections for backpressure.
+
+A failed batch is split in half and retried until the bad rows are isolated,
+so one row the database rejects cannot hold back the rest. A row that keeps
+failing for ``max_attempts`` flushes is moved to ``dead_letters()``.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+CLOCK_IN = "clock_in"
+CLOCK_OUT = "clock_out"
+
+
+class AttendanceQueue:
+    def __init__(self, write_clock_ins, write_clock_outs, flush_interval=2.0, max_batch=500, max_pending=10000,
+                 max_attempts=5, max_dead_letters=1000):
+        self.write_clock_ins = write_clock_ins
+        self.write_clock_outs = write_clock_outs
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._pending = {CLOCK_IN: {}, CLOCK_OUT: {}}
+        self._attempts = {}
+        self._dead = deque(maxlen=max_dead_letters)
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._counters = {
+            "submitted": 0, "coalesced": 0, "rejected": 0,
+            "flushes": 0, "rows_written": 0, "failures": 0, "dead_lettered": 0,
+        }
+        self._last_flush_seconds = None
+        self._worker = threading.Thread(target=self._run, name="attendance-queue", daemon=True)
+        self._worker.start()
+
+    def submit(self, employee_id, kind, at=None):
+        """Queue one swipe. Returns ``False`` (and drops it) when the queue is full."""
+        if kind not in self._pending:
+            raise ValueError(f"Unknown attendance event: {kind}")
+        at = at or datetime.now()
+        key = (employee_id, at.date().isoformat())
+        with self._lock:
+            pending = self._pending[kind]
+            if key in pending:
+                self._counters["coalesced"] += 1
+                current = pending[key]
+                pending[key] = min(current, at) if kind == CLOCK_IN else max(current, at)
+            elif self._depth() >= self.max_pending:
+                self._counters["rejected"] += 1
+                return False
+            else:
+                pending[key] = at
+                self._oldest = self._oldest or time.time()
+            self._counters["submitted"] += 1
+            if self._depth() >= self.max_batch:
+                self._wake.set()
+        return True
+
+    def flush(self):
+        """Write everything queued so far; rows that fail are retried on later flushes."""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {CLOCK_IN: {}, CLOCK_OUT: {}}
+                self._oldest = None
+            if not batch[CLOCK_IN] and not batch[CLOCK_OUT]:
+                return 0
+            started = time.perf_counter()
+            written = 0
+            # Clock-ins first so a same-flush clock-out updates an existing row.
+            for kind, write in ((CLOCK_IN, self.write_clock_ins), (CLOCK_OUT, self.write_clock_outs)):
+                rows = [
+                    {"employee_id": employee_id, "date": day, kind: at.isoformat()}
+                    for (employee_id, day), at in batch[kind].items()
+                ]
+                for start in range(0, len(rows), self.max_batch):
+                    written += self._write(kind, write, rows[start:start + self.max_batch])
+            with self._lock:
+                self._counters["flushes"] += 1
+                self._counters["rows_written"] += written
+                self._last_flush_seconds = time.perf_counter() - started
+            return written
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics["pending"] = self._depth()
+            metrics["capacity"] = self.max_pending
+            metrics["oldest_pending_seconds"] = round(time.time() - self._oldest, 1) if self._oldest else 0.0
+            metrics["last_flush_seconds"] = self._last_flush_seconds
+            metrics["dead_letters"] = len(self._dead)
+        return metrics
+
+    def dead_letters(self):
+        """Rows given up on after ``max_attempts`` failed flushes, oldest first."""
+        with self._lock:
+            return list(self._dead)
+
+    def _depth(self):
+        return len(self._pending[CLOCK_IN]) + len(self._pending[CLOCK_OUT])
+
+    def _write(self, kind, write, rows):
+        """Write ``rows``, bisecting on failure so only the rows that fail are retried."""
+        try:
+            write(rows)
+        except Exception as e:
+            with self._lock:
+                self._counters["failures"] += 1
+            if len(rows) == 1:
+                self._retry_or_drop(kind, rows[0], e)
+                return 0
+            middle = len(rows) // 2
+            return self._write(kind, write, rows[:middle]) + self._write(kind, write, rows[middle:])
+        with self._lock:
+            for row in rows:
+                self._attempts.pop((kind, row["employee_id"], row["date"]), None)
+        return len(rows)
+
+    def _retry_or_drop(self, kind, row, error):
+        key = (kind, row["employee_id"], row["date"])
+        with self._lock:
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts < self.max_attempts:
+                self._attempts[key] = attempts
+            else:
+                self._attempts.pop(key, None)
+                self._dead.append({**row, "kind": kind, "attempts": attempts, "error": str(error),
+                                   "failed_at": datetime.now().isoformat(timespec="seconds")})
+                self._counters["dead_lettered"] += 1
+                return
+        self._requeue(kind, [row])
+
+    def _requeue(self, kind, rows):
+        with self._lock:
+            pending = self._pending[kind]
+            for row in rows:
+                key = (row["employee_id"], row["date"])
+                at = datetime.fromisoformat(row[kind])
+                if key in pending:
+                    at = min(pending[key], at) if kind == CLOCK_IN else max(pending[key], at)
+                pending[key] = at
+            self._oldest = self._oldest or time.time()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_attendance_queue(write_clock_ins, write_clock_outs, **kwargs):
+    """Return the process-wide queue, creating it with the given writers on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = AttendanceQueue(write_clock_ins, write_clock_outs, **kwargs)
+        return _queue
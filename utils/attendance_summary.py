@@ -0,0 +1,254 @@
+"""Incrementally maintained attendance rollups for HRMS reports.
+
+Raw attendance rows are loaded once and reduced to per-employee daily facts,
+which are rolled up into daily, weekly and monthly buckets. After the TTL only
+the last ``refresh_days`` are re-read and swapped in, in the background of the
+viewer that noticed; the full history is rebuilt every ``rebuild_after``
+seconds. New clock events update the facts and adjust only the affected
+buckets, so a report reads a handful of buckets per employee instead of
+re-fetching and reshaping every raw row.
+"""
+import threading
+import time as _time
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+PERIODS = ("D", "W", "M")
+
+
+def period_start(day, period):
+    if period == "D":
+        return day
+    if period == "W":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start, period):
+    if period == "D":
+        return start
+    if period == "W":
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def attendance_display_frame(rows):
+    """Vectorised reshape of ``attendance`` rows (with an ``employees(name)`` join) for display."""
+    df = pd.DataFrame(rows)
+    display_df = pd.DataFrame({
+        'Employee ID': df['employee_id'],
+        'Employee Name': df['employees'].str.get('name'),
+        'Date': pd.to_datetime(df['date'], format='ISO8601').dt.strftime('%Y-%m-%d'),
+        'Clock In': pd.to_datetime(df['clock_in'], format='ISO8601').dt.strftime('%I:%M %p'),
+        'Clock Out': pd.to_datetime(df['clock_out'], format='ISO8601').dt.strftime('%I:%M %p'),
+    })
+    return display_df
+
+
+def _missing(value):
+    return value is None or pd.isna(value)
+
+
+def _parse(value):
+    """``datetime`` from an ISO string; ``None`` for NULL, NaN and NaT."""
+    if _missing(value):
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class AttendanceSummary:
+    def __init__(self, loader, departments_loader, ttl=900, late_after=time(9, 15), history_days=400,
+                 refresh_days=7, rebuild_after=86400):
+        """``loader(start_date)`` returns raw rows with ``employee_id, date, clock_in, clock_out``;
+        ``departments_loader()`` returns rows with ``id, department``.
+        """
+        self.loader = loader
+        self.departments_loader = departments_loader
+        self.ttl = ttl
+        self.late_after = late_after
+        self.history_days = history_days
+        self.refresh_days = refresh_days
+        self.rebuild_after = rebuild_after
+        self._facts = {}
+        self._buckets = {period: {} for period in PERIODS}
+        self._departments = {}
+        self._loaded_at = None
+        self._rebuilt_at = None
+        self._replay = None
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+
+    def record(self, employee_id, day, clock_in=None, clock_out=None):
+        """Apply one clock event to the daily fact and its buckets."""
+        day = day if isinstance(day, date) else date.fromisoformat(day)
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((employee_id, day, clock_in, clock_out))
+            if self._loaded_at is None:
+                return
+            key = (employee_id, day)
+            previous = self._facts.get(key)
+            stored_in, stored_out = (previous[3], previous[4]) if previous else (None, None)
+            clock_in = min((v for v in (_parse(clock_in), _parse(stored_in)) if v is not None), default=None)
+            clock_out = max((v for v in (_parse(clock_out), _parse(stored_out)) if v is not None), default=None)
+            fact = self._fact(clock_in, clock_out)
+            if previous:
+                self._apply(employee_id, day, previous, sign=-1)
+            self._facts[key] = fact
+            self._apply(employee_id, day, fact, sign=1)
+
+    def report(self, start, end, period="M", by="employee", employee_id=None):
+        """Hours worked, late arrivals, days present and absences per period.
+
+        Covers every period that starts between ``start`` (aligned down to its
+        period boundary) and ``end``, up to today. Every known employee gets a
+        row per period, so one with no clock-ins is counted absent on every
+        weekday up to today.
+        """
+        self._ensure_loaded()
+        today = date.today()
+        records = []
+        with self._lock:
+            bucket_start = period_start(start, period)
+            while bucket_start <= min(end, today):
+                employees = self._buckets[period].get(bucket_start, {})
+                workdays = int(np.busday_count(bucket_start, min(period_end(bucket_start, period), today) + timedelta(days=1)))
+                roster = dict.fromkeys(self._departments)
+                roster.update(dict.fromkeys(employees))
+                for bucket_employee in roster:
+                    if employee_id is not None and bucket_employee != employee_id:
+                        continue
+                    hours, late, present = employees.get(bucket_employee, (0.0, 0, 0))
+                    records.append({
+                        "period": bucket_start,
+                        "employee_id": bucket_employee,
+                        "department": self._departments.get(bucket_employee, "Unknown"),
+                        "hours_worked": hours,
+                        "late_arrivals": late,
+                        "days_present": present,
+                        "absences": max(workdays - present, 0),
+                    })
+                bucket_start = period_end(bucket_start, period) + timedelta(days=1)
+        frame = pd.DataFrame(records, columns=["period", "employee_id", "department", "hours_worked",
+                                               "late_arrivals", "days_present", "absences"])
+        if by == "department":
+            frame = frame.groupby(["period", "department"], as_index=False)[
+                ["hours_worked", "late_arrivals", "days_present", "absences"]
+            ].sum()
+        frame["hours_worked"] = frame["hours_worked"].round(2)
+        return frame.sort_values("period").reset_index(drop=True)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _fact(self, clock_in, clock_out):
+        hours = (clock_out - clock_in).total_seconds() / 3600 if clock_in is not None and clock_out is not None else 0.0
+        late = int(clock_in is not None and clock_in.time() > self.late_after)
+        present = int(clock_in is not None)
+        return (max(hours, 0.0), late, present, clock_in, clock_out)
+
+    def _apply(self, employee_id, day, fact, sign):
+        for period in PERIODS:
+            employees = self._buckets[period].setdefault(period_start(day, period), {})
+            totals = employees.get(employee_id, (0.0, 0, 0))
+            employees[employee_id] = tuple(total + sign * value for total, value in zip(totals, fact[:3]))
+
+    def _stale(self):
+        return self._loaded_at is None or _time.time() - self._loaded_at >= self.ttl
+
+    def _ensure_loaded(self):
+        if not self._stale():
+            return
+        # Only the first load makes viewers wait; later refreshes run in one
+        # thread while everyone else keeps reading the current rollups.
+        if not self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if not self._stale():
+                return
+            now = _time.time()
+            full = self._loaded_at is None or now - self._rebuilt_at >= self.rebuild_after
+            since = date.today() - timedelta(days=self.history_days if full else self.refresh_days)
+            with self._lock:
+                self._replay = []
+            facts, frame = self._load_facts(self.loader(since.isoformat()))
+            departments = {row["id"]: row["department"] for row in self.departments_loader()}
+            with self._lock:
+                if full:
+                    self._facts = facts
+                    self._buckets = self._rollup(frame)
+                    self._rebuilt_at = now
+                else:
+                    for (employee_id, day), fact in list(self._facts.items()):
+                        if day >= since:
+                            self._apply(employee_id, day, fact, sign=-1)
+                            del self._facts[(employee_id, day)]
+                    for (employee_id, day), fact in facts.items():
+                        self._facts[(employee_id, day)] = fact
+                        self._apply(employee_id, day, fact, sign=1)
+                self._departments = departments
+                self._loaded_at = now
+                # Clock events recorded while the rows were being fetched may be
+                # missing from them; merging them again is idempotent.
+                replay, self._replay = self._replay, None
+                for event in replay:
+                    self.record(*event)
+        finally:
+            with self._lock:
+                self._replay = None
+            self._refresh_lock.release()
+
+    def _load_facts(self, rows):
+        """Daily facts keyed by ``(employee_id, day)`` plus the same facts as a frame for rolling up."""
+        raw = pd.DataFrame(rows, columns=["employee_id", "date", "clock_in", "clock_out"])
+        raw["date"] = pd.to_datetime(raw["date"], format="ISO8601").dt.date
+        clock_in = pd.to_datetime(raw["clock_in"], format="ISO8601")
+        clock_out = pd.to_datetime(raw["clock_out"], format="ISO8601")
+        hours = ((clock_out - clock_in).dt.total_seconds() / 3600).clip(lower=0).fillna(0.0)
+        late_cutoff = self.late_after.hour * 60 + self.late_after.minute
+        minutes = clock_in.dt.hour * 60 + clock_in.dt.minute + (clock_in.dt.second > 0)
+        late = (minutes > late_cutoff).astype(int).where(clock_in.notna(), 0)
+        present = clock_in.notna().astype(int)
+
+        facts = {
+            (employee_id, day): (float(h), int(l), int(p), ci, co)
+            for employee_id, day, h, l, p, ci, co in zip(
+                raw["employee_id"], raw["date"], hours, late, present,
+                map(_parse, clock_in.dt.to_pydatetime()), map(_parse, clock_out.dt.to_pydatetime())
+            )
+        }
+        frame = pd.DataFrame({
+            "employee_id": raw["employee_id"], "date": raw["date"],
+            "hours": hours, "late": late, "present": present,
+        })
+        return facts, frame
+
+    def _rollup(self, frame):
+        rollups = {}
+        for period in PERIODS:
+            frame["bucket"] = [period_start(day, period) for day in frame["date"]]
+            grouped = frame.groupby(["bucket", "employee_id"])[["hours", "late", "present"]].sum()
+            buckets = {}
+            for (bucket_start, employee_id), (h, l, p) in zip(grouped.index, grouped.itertuples(index=False)):
+                buckets.setdefault(bucket_start, {})[employee_id] = (float(h), int(l), int(p))
+            rollups[period] = buckets
+        return rollups
+
+
+_summary = None
+_summary_lock = threading.Lock()
+
+
+def get_attendance_summary(loader, departments_loader, **kwargs):
+    """Return the process-wide summary, creating it with the given loaders on first use."""
+    global _summary
+    with _summary_lock:
+        if _summary is None:
+            _summary = AttendanceSummary(loader, departments_loader, **kwargs)
+        return _summary
@@ -0,0 +1,113 @@
+"""Bulk employee import/export helpers for the HRMS dashboard.
+
+Uploads are read in chunks, validated with vectorised pandas operations and
+written in fixed-size batches, so a failure only affects its own batch. Exports
+are produced page by page as CSV text.
+"""
+import csv
+import io
+import time
+from pathlib import Path
+
+import pandas as pd
+
+EMPLOYEE_COLUMNS = ["name", "email", "department", "role", "hire_date"]
+REQUIRED_COLUMNS = ["name", "email", "department"]
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+
+def read_employee_chunks(uploaded_file, chunksize=5000):
+    """Yield DataFrame chunks from a CSV or XLSX upload.
+
+    CSV is streamed with ``chunksize`` rows per chunk. Excel files cannot be
+    read incrementally by pandas, so they are loaded once and sliced.
+    """
+    suffix = Path(uploaded_file.name).suffix.lower()
+    if suffix == ".csv":
+        yield from pd.read_csv(uploaded_file, dtype=str, chunksize=chunksize, keep_default_na=False)
+    elif suffix in (".xlsx", ".xls"):
+        frame = pd.read_excel(uploaded_file, dtype=str).fillna("")
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+    else:
+        raise ValueError(f"Unsupported file format: {suffix}")
+
+
+def validate_employees(frame, departments):
+    """Split a raw chunk into ``(valid_rows, errors)``.
+
+    ``errors`` has one row per rejected input row with its 1-based data row
+    number in the file and the reasons it was rejected.
+    """
+    frame = frame.rename(columns=lambda column: str(column).strip().lower().replace(" ", "_"))
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    frame = frame.reindex(columns=EMPLOYEE_COLUMNS).fillna("")
+    frame = frame.apply(lambda column: column.astype(str).str.strip())
+    frame["email"] = frame["email"].str.lower()
+
+    reasons = pd.Series("", index=frame.index)
+    for column in REQUIRED_COLUMNS:
+        reasons = reasons.mask(frame[column] == "", reasons + f"missing {column}; ")
+    reasons = reasons.mask(
+        (frame["email"] != "") & ~frame["email"].str.match(EMAIL_PATTERN), reasons + "invalid email; "
+    )
+    reasons = reasons.mask(
+        (frame["department"] != "") & ~frame["department"].isin(departments), reasons + "unknown department; "
+    )
+    hire_dates = pd.to_datetime(frame["hire_date"].replace("", None), errors="coerce")
+    reasons = reasons.mask((frame["hire_date"] != "") & hire_dates.isna(), reasons + "invalid hire_date; ")
+    reasons = reasons.mask(
+        (frame["email"] != "") & frame["email"].duplicated(keep="first"), reasons + "duplicate email in file; "
+    )
+
+    invalid = reasons != ""
+    valid = frame.loc[~invalid].copy()
+    valid["hire_date"] = hire_dates.loc[~invalid].dt.strftime("%Y-%m-%d")
+    valid = valid.astype(object).where((valid != "") & valid.notna(), None)
+    errors = pd.DataFrame({
+        "row": frame.index[invalid] + 1,
+        "errors": reasons.loc[invalid].str.rstrip("; "),
+    })
+    return valid, errors
+
+
+def upsert_in_batches(frame, write_batch, batch_size=500):
+    """Write ``frame`` with ``write_batch(records)`` in batches and yield one report per batch."""
+    records = frame.to_dict("records")
+    for number, start in enumerate(range(0, len(records), batch_size), start=1):
+        batch = records[start:start + batch_size]
+        started = time.perf_counter()
+        try:
+            result = write_batch(batch)
+            error = None
+        except Exception as e:
+            result = None
+            error = str(e)
+        yield {
+            "batch": number,
+            "rows": len(batch),
+            "ok": error is None,
+            "error": error,
+            "seconds": time.perf_counter() - started,
+            "result": result,
+        }
+
+
+def iter_csv_chunks(rows, columns, rows_per_chunk=1000):
+    """Yield CSV text for ``rows`` (an iterable of dicts) a chunk at a time, header first."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,125 @@
+"""Named, process-wide cache regions that can be invalidated independently.
+
+Each region keeps its own entries, TTL and hit/miss counters, so refreshing
+market data does not throw away AI analyses (or another page's caches) the way
+``st.cache_data.clear()`` does. ``all_regions()`` feeds the cache admin view.
+Regions hold at most ``max_entries`` values, evicting the least recently used.
+"""
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return sys.getsizeof(value)
+
+
+class CacheRegion:
+    def __init__(self, name, ttl=None, max_entries=256):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.created_at = time.time()
+        self.invalidated_at = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[1] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        now = time.time()
+        size = estimate_size(value)
+        with self._lock:
+            if self.ttl is not None:
+                for stale in [k for k, (_, created, _) in self._entries.items() if now - created >= self.ttl]:
+                    del self._entries[stale]
+            self._entries[key] = (value, now, size)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def cached(self, func):
+        """Cache ``func`` results in this region, keyed on its (hashable) arguments.
+
+        DataFrames are copied on the way out so callers cannot mutate the
+        cached value.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            found, value = self.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                self.set(key, value)
+            return value.copy() if isinstance(value, pd.DataFrame) else value
+
+        wrapper.region = self
+        return wrapper
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidated_at = time.time()
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.values())
+        lookups = self.hits + self.misses
+        oldest = min((created for _, created, _ in entries), default=None)
+        return {
+            "region": self.name,
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "age_seconds": int(now - oldest) if oldest is not None else None,
+            "ttl_seconds": self.ttl,
+            "last_invalidated": self.invalidated_at,
+        }
+
+
+_regions = {}
+_regions_lock = threading.Lock()
+
+
+def get_region(name, ttl=None, max_entries=256):
+    """Return the named region, creating it with ``ttl`` and ``max_entries`` on first use."""
+    with _regions_lock:
+        region = _regions.get(name)
+        if region is None:
+            region = CacheRegion(name, ttl, max_entries)
+            _regions[name] = region
+        return region
+
+
+def all_regions():
+    with _regions_lock:
+        return list(_regions.values())
@@ -0,0 +1,112 @@
+"""Token-aware chunking and map-reduce helpers for long documents.
+
+Token counts use the same ~4 characters per token estimate as the chat
+history (``utils.conversation.estimate_tokens``), which is close enough to
+keep prompts within a model's context window.
+"""
+import itertools
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.conversation import estimate_tokens
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _paragraphs(texts):
+    for text in texts:
+        start = 0
+        for match in _PARAGRAPH_BREAK.finditer(text):
+            yield text[start:match.start()]
+            start = match.end()
+        yield text[start:]
+
+
+def _pieces(texts, max_tokens):
+    """Split texts into paragraph, then sentence, then fixed-width pieces that fit ``max_tokens``."""
+    for paragraph in _paragraphs(texts):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            yield paragraph
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                yield sentence
+            else:
+                width = max_tokens * 4
+                for start in range(0, len(sentence), width):
+                    yield sentence[start:start + width]
+
+
+def iter_chunks(texts, max_tokens=3000, overlap_tokens=150):
+    """Greedily pack pieces of ``texts`` (e.g. pages from ``iter_document_text``) into chunks.
+
+    Chunks are yielded as soon as they are full, so a page generator can be
+    consumed lazily. Each chunk after the first starts with the tail of the
+    previous one (about ``overlap_tokens``) so statements cut at a boundary
+    keep context.
+    """
+    current = []
+    current_tokens = 0
+    for piece in _pieces(texts, max_tokens - overlap_tokens):
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunk = "\n\n".join(current)
+            yield chunk
+            tail = chunk[-overlap_tokens * 4:] if overlap_tokens else ""
+            current = [tail] if tail else []
+            current_tokens = estimate_tokens(tail) if tail else 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        yield "\n\n".join(current)
+
+
+def chunk_text(text, max_tokens=3000, overlap_tokens=150):
+    return list(iter_chunks([text], max_tokens, overlap_tokens))
+
+
+def map_chunks(chunks, map_fn, max_workers=4):
+    """Run ``map_fn`` over chunks concurrently; yield ``(index, result)`` as each finishes.
+
+    ``chunks`` may be a generator (e.g. ``iter_chunks`` over extracted pages):
+    at most ``2 * max_workers`` chunks are pulled ahead of the results, so the
+    document is never held in memory all at once.
+    """
+    chunks = enumerate(chunks)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(map_fn, chunk): index for index, chunk in itertools.islice(chunks, 2 * max_workers)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                for next_index, chunk in itertools.islice(chunks, 1):
+                    pending[executor.submit(map_fn, chunk)] = next_index
+                yield index, future.result()
+
+
+def reduce_hierarchically(parts, combine_fn, max_tokens=5000, max_workers=4):
+    """Combine ``parts`` in groups that fit ``max_tokens`` until they fit in one prompt.
+
+    Returns the remaining parts (in order), whose total fits ``max_tokens``.
+    """
+    while len(parts) > 1 and sum(estimate_tokens(part) for part in parts) > max_tokens:
+        groups = []
+        current, current_tokens = [], 0
+        for part in parts:
+            tokens = estimate_tokens(part)
+            if current and current_tokens + tokens > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += tokens
+        groups.append(current)
+        if len(groups) == len(parts):
+            # Every part fills a prompt on its own; combining cannot shrink further.
+            break
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            parts = list(executor.map(combine_fn, groups))
+    return parts
@@ -0,0 +1,89 @@
+"""Bounded conversation memory for the HR chatbot.
+
+The full transcript is kept for display, but only a token-budgeted window of
+recent turns is sent to the model. Turns that fall out of the window are folded
+into a running summary, one batch at a time, so the prompt size stays flat no
+matter how long the session runs.
+"""
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+
+def format_turns(turns):
+    return "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in turns)
+
+
+class ConversationStore:
+    def __init__(self, token_budget=1500, summary_budget=300, summarize=None):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summarize = summarize
+        self.messages = []
+        self.summary = ""
+        self._window_start = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, role, content):
+        self.messages.append({"role": role, "content": content, "tokens": estimate_tokens(content)})
+
+    def window(self):
+        return self.messages[self._window_start:]
+
+    def window_tokens(self):
+        return sum(turn["tokens"] for turn in self.window())
+
+    def compact(self):
+        """Move the oldest turns out of the window until it fits the budget.
+
+        Always keeps the latest turn so the current question is never dropped.
+        """
+        evicted = []
+        total = self.window_tokens()
+        while total > self.token_budget and self._window_start < len(self.messages) - 1:
+            turn = self.messages[self._window_start]
+            evicted.append(turn)
+            total -= turn["tokens"]
+            self._window_start += 1
+        if evicted:
+            self.summary = self._fold_into_summary(evicted)
+        return evicted
+
+    def build_context(self):
+        """Prompt-ready context: running summary followed by the recent window."""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation:\n{self.summary}")
+        window = self.window()
+        if window:
+            parts.append(f"Recent conversation:\n{format_turns(window)}")
+        return "\n\n".join(parts)
+
+    def page_count(self, page_size):
+        return max(1, -(-len(self.messages) // page_size))
+
+    def page(self, page_number, page_size):
+        """Messages for a 1-based page, oldest page first."""
+        start = (page_number - 1) * page_size
+        return self.messages[start:start + page_size]
+
+    def _fold_into_summary(self, evicted):
+        if self.summarize is not None:
+            try:
+                summary = self.summarize(self.summary, format_turns(evicted))
+            except Exception:
+                summary = None
+            if summary:
+                return self._clip(summary)
+        # Without a summarizer keep the most recent text that fits the budget.
+        return self._clip(f"{self.summary}\n{format_turns(evicted)}".strip(), keep_tail=True)
+
+    def _clip(self, text, keep_tail=False):
+        limit = self.summary_budget * 4
+        if len(text) <= limit:
+            return text
+        return text[-limit:] if keep_tail else text[:limit]
@@ -0,0 +1,77 @@
+"""Lazy, page-at-a-time text extraction for PDF, DOCX, PPTX and TXT uploads.
+
+``iter_document_text`` yields one page (PDF), slide (PPTX) or block of
+paragraphs (DOCX/TXT) at a time, so callers can feed a chunker as pages are
+parsed and stop early once they have enough text, instead of materialising
+every page and a joined copy of the whole document.
+"""
+import codecs
+import io
+
+import docx
+import PyPDF2
+import pptx
+
+DOCX_BLOCK_PARAGRAPHS = 50
+TXT_BLOCK_BYTES = 64 * 1024
+
+
+def _as_file(source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _iter_pdf(source):
+    # PdfReader parses page objects lazily; text is produced one page at a time.
+    reader = PyPDF2.PdfReader(_as_file(source))
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def _iter_docx(source):
+    block = []
+    for paragraph in docx.Document(_as_file(source)).paragraphs:
+        block.append(paragraph.text)
+        if len(block) >= DOCX_BLOCK_PARAGRAPHS:
+            yield "\n".join(block)
+            block = []
+    if block:
+        yield "\n".join(block)
+
+
+def _iter_pptx(source):
+    for slide in pptx.Presentation(_as_file(source)).slides:
+        texts = [shape.text for shape in slide.shapes if hasattr(shape, "text")]
+        if texts:
+            yield "\n".join(texts)
+
+
+def _iter_txt(source):
+    data = source if isinstance(source, (bytes, bytearray)) else source.getvalue()
+    # Decode block by block so the whole file never exists as one string.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for start in range(0, len(data), TXT_BLOCK_BYTES):
+        text = decoder.decode(data[start:start + TXT_BLOCK_BYTES], final=start + TXT_BLOCK_BYTES >= len(data))
+        if text:
+            yield text
+
+
+EXTRACTORS = {
+    ".pdf": _iter_pdf,
+    ".docx": _iter_docx,
+    ".pptx": _iter_pptx,
+    ".txt": _iter_txt,
+}
+
+
+def iter_document_text(source, file_extension, max_chars=None):
+    """Yield text a page/slide/block at a time, stopping once ``max_chars`` have been produced."""
+    extractor = EXTRACTORS.get(file_extension)
+    if extractor is None:
+        raise ValueError(f"Unsupported file format: {file_extension}")
+    produced = 0
+    for text in extractor(source):
+        if max_chars is not None and produced + len(text) >= max_chars:
+            yield text[:max_chars - produced]
+            return
+        produced += len(text)
+        yield text
@@ -0,0 +1,124 @@
+"""Process-wide id <-> name index of employees for HRMS pickers.
+
+The index loads once for all sessions, is kept current by the write paths in
+``EmployeeManagement`` and reloads after a TTL to pick up changes made outside
+the app. ``search`` does prefix matching on each word of a name with a bisect
+over a sorted token list, so typeahead stays fast at large headcounts.
+"""
+import bisect
+import threading
+import time
+
+
+def _tokens(name):
+    name = (name or "").lower()
+    return {name, *name.split()}
+
+
+class EmployeeIndex:
+    def __init__(self, loader, ttl=300):
+        self.loader = loader
+        self.ttl = ttl
+        self._by_id = {}
+        self._by_name = {}
+        self._tokens = []
+        self._ordered = None
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._by_id)
+
+    def name_of(self, employee_id):
+        self._ensure_loaded()
+        return self._by_id.get(employee_id)
+
+    def ids_for(self, name):
+        self._ensure_loaded()
+        return list(self._by_name.get(name, ()))
+
+    def upsert(self, employee_id, name):
+        with self._lock:
+            previous = self._by_id.get(employee_id)
+            if previous is not None:
+                self._forget(employee_id, previous)
+            self._by_id[employee_id] = name
+            self._by_name.setdefault(name, []).append(employee_id)
+            for token in _tokens(name):
+                bisect.insort(self._tokens, (token, employee_id))
+            self._ordered = None
+
+    def remove(self, employee_id):
+        with self._lock:
+            name = self._by_id.pop(employee_id, None)
+            if name is not None:
+                self._forget(employee_id, name)
+                self._ordered = None
+
+    def search(self, query="", limit=50):
+        """``(id, name)`` pairs whose name (or a word in it) starts with ``query``."""
+        self._ensure_loaded()
+        query = query.strip().lower()
+        with self._lock:
+            if not query:
+                if self._ordered is None:
+                    self._ordered = sorted(self._by_id.items(), key=lambda item: (item[1] or "").lower())
+                return self._ordered[:limit]
+            matches = {}
+            if query.isdigit() and int(query) in self._by_id:
+                matches[int(query)] = self._by_id[int(query)]
+            position = bisect.bisect_left(self._tokens, (query,))
+            while position < len(self._tokens) and len(matches) < limit:
+                token, employee_id = self._tokens[position]
+                if not token.startswith(query):
+                    break
+                matches.setdefault(employee_id, self._by_id[employee_id])
+                position += 1
+            return list(matches.items())[:limit]
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.time() - self._loaded_at < self.ttl:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.time() - self._loaded_at < self.ttl:
+                return
+            by_id = {row['id']: row['name'] for row in self.loader()}
+            by_name = {}
+            for employee_id, name in by_id.items():
+                by_name.setdefault(name, []).append(employee_id)
+            self._tokens = sorted(
+                (token, employee_id) for employee_id, name in by_id.items() for token in _tokens(name)
+            )
+            self._by_id = by_id
+            self._by_name = by_name
+            self._ordered = None
+            self._loaded_at = time.time()
+
+    def _forget(self, employee_id, name):
+        ids = self._by_name.get(name, [])
+        if employee_id in ids:
+            ids.remove(employee_id)
+            if not ids:
+                del self._by_name[name]
+        for token in _tokens(name):
+            position = bisect.bisect_left(self._tokens, (token, employee_id))
+            if position < len(self._tokens) and self._tokens[position] == (token, employee_id):
+                del self._tokens[position]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_employee_index(loader, ttl=300):
+    """Return the shared index, creating it with ``loader`` on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = EmployeeIndex(loader, ttl)
+        return _index
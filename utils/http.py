@@ -0,0 +1,77 @@
+"""Shared keep-alive HTTP session for outbound API calls.
+
+One ``requests.Session`` per process keeps TCP/TLS connections to IBM Cloud
+open between calls. Pool size, timeouts and retry behaviour can be tuned with
+environment variables:
+
+- ``HTTP_POOL_SIZE``: connections kept per host (default 10)
+- ``HTTP_CONNECT_TIMEOUT`` / ``HTTP_READ_TIMEOUT``: seconds (default 5 / 120)
+- ``HTTP_MAX_RETRIES``: retries on 429 and 5xx responses (default 3)
+- ``HTTP_BACKOFF_FACTOR``: exponential backoff base in seconds (default 0.5)
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def env_number(name, default, cast=float):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return cast(value)
+
+
+def default_timeout():
+    """``(connect, read)`` timeout tuple passed to every request."""
+    return (
+        env_number("HTTP_CONNECT_TIMEOUT", 5.0),
+        env_number("HTTP_READ_TIMEOUT", 120.0),
+    )
+
+
+def create_session(pool_size=None, max_retries=None, backoff_factor=None):
+    """Build a pooled session that retries throttled and failed requests."""
+    pool_size = pool_size if pool_size is not None else env_number("HTTP_POOL_SIZE", 10, int)
+    max_retries = max_retries if max_retries is not None else env_number("HTTP_MAX_RETRIES", 3, int)
+    backoff_factor = backoff_factor if backoff_factor is not None else env_number("HTTP_BACKOFF_FACTOR", 0.5)
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        status_forcelist=RETRY_STATUSES,
+        # Token exchange and text generation are safe to repeat.
+        allowed_methods=frozenset(["GET", "POST"]),
+        backoff_factor=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def post(url, **kwargs):
+    """``requests.post`` over the shared session with the default timeout."""
+    kwargs.setdefault("timeout", default_timeout())
+    return get_session().post(url, **kwargs)
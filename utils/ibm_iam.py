@@ -0,0 +1,128 @@
+"""Process-wide IBM Cloud IAM token cache.
+
+Every Streamlit session in the process shares one ``IAMTokenManager`` per API
+key, so a token is minted once and reused until shortly before it expires.
+"""
+import logging
+import threading
+import time
+
+from utils import http
+
+IAM_TOKEN_URL = "https://iam.cloud.ibm.com/identity/token"
+
+logger = logging.getLogger(__name__)
+
+
+def request_iam_token(api_key):
+    """Exchange an API key for a fresh IAM token payload."""
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    data = {"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": api_key}
+    response = http.post(IAM_TOKEN_URL, headers=headers, data=data)
+    if response.status_code == 200:
+        return response.json()
+    else:
+        raise Exception(f"Failed to get IAM token: {response.text}")
+
+
+class IAMTokenManager:
+    """Caches an IAM token and renews it in the background before it expires.
+
+    ``refresh_margin`` is how long before expiry the background renewal runs;
+    ``min_validity`` is the point after which callers stop trusting the cached
+    token and renew it themselves.
+    """
+
+    def __init__(self, api_key, refresh_margin=300, min_validity=60, fetch=request_iam_token):
+        self.api_key = api_key
+        self.refresh_margin = refresh_margin
+        self.min_validity = min_validity
+        self._fetch = fetch
+        self._token = None
+        self._expires_at = 0.0
+        self._renewed_at = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._timer = None
+        self._counters = {"hits": 0, "renewals": 0, "background_renewals": 0, "failures": 0}
+
+    def get_token(self):
+        if self._is_valid():
+            self._count("hits")
+            return self._token
+        # Single flight: only one caller renews, the rest wait and reuse it.
+        with self._lock:
+            if self._is_valid():
+                self._count("hits")
+                return self._token
+            self._renew()
+            return self._token
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._counters)
+        stats["expires_in"] = max(0, int(self._expires_at - time.time())) if self._token else 0
+        stats["renewed_at"] = self._renewed_at
+        return stats
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _is_valid(self):
+        return self._token is not None and time.time() < self._expires_at - self.min_validity
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._counters[name] += 1
+
+    def _renew(self):
+        try:
+            payload = self._fetch(self.api_key)
+        except Exception:
+            self._count("failures")
+            raise
+        expires_in = int(payload.get("expires_in", 3600))
+        self._token = payload["access_token"]
+        self._renewed_at = time.time()
+        self._expires_at = self._renewed_at + expires_in
+        self._count("renewals")
+        self._schedule_refresh(expires_in)
+        stats = self.stats()
+        logger.info(
+            "IAM token renewed, valid for %ds (%d renewals, %d cache hits, %d failures so far)",
+            expires_in, stats["renewals"], stats["hits"], stats["failures"]
+        )
+
+    def _schedule_refresh(self, expires_in):
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = max(expires_in - self.refresh_margin, 1)
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            try:
+                self._renew()
+                self._count("background_renewals")
+            except Exception:
+                # Leave the current token in place; the next caller retries once
+                # it drops below min_validity.
+                logger.warning("Background IAM token renewal failed", exc_info=True)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(api_key):
+    """Return the shared token manager for ``api_key``, creating it on first use."""
+    with _managers_lock:
+        manager = _managers.get(api_key)
+        if manager is None:
+            manager = IAMTokenManager(api_key)
+            _managers[api_key] = manager
+        return manager
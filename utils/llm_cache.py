@@ -0,0 +1,209 @@
+"""Content-addressed cache for LLM completions, shared by all dashboards.
+
+Responses are stored in a small SQLite file keyed by a SHA-256 of
+``(model, parameters, prompt)``. Entries expire after a TTL and the least
+recently used ones are evicted once the store grows past its size cap.
+
+Configuration (environment variables):
+
+- ``LLM_CACHE_DIR``: directory for the store (default ``.cache/llm``)
+- ``LLM_CACHE_TTL``: entry lifetime in seconds (default 86400)
+- ``LLM_CACHE_MAX_BYTES``: size cap for cached responses (default 64 MB)
+- ``LLM_CACHE_SAMPLED``: set to ``0`` to skip caching calls made with
+  ``temperature > 0`` (default ``1``)
+- ``LLM_CACHE_DISABLED``: set to ``1`` to turn the cache off entirely
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.single_flight import SingleFlight
+
+
+def cache_key(model, params, prompt):
+    payload = json.dumps({"model": model, "params": params, "prompt": prompt}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _env_flag(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.lower() not in ("0", "false", "no", "off")
+
+
+class LLMCache:
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl=86400, cache_sampled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_sampled = cache_sampled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._conn.commit()
+
+    def get(self, key, not_before=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl or (not_before is not None and row[1] < not_before):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def should_bypass(self, params):
+        return not self.cache_sampled and (params or {}).get("temperature", 0) > 0
+
+    def get_or_compute(self, model, params, prompt, compute, bypass=None, not_before=None):
+        """Return the cached completion or call ``compute()`` and store its result.
+
+        ``bypass=True`` always calls the model; ``None`` applies the
+        temperature policy from ``should_bypass``. Entries stored before the
+        ``not_before`` timestamp are treated as stale. Empty results are not
+        cached.
+        """
+        if bypass is None:
+            bypass = self.should_bypass(params)
+        if bypass:
+            return compute()
+        key = cache_key(model, params, prompt)
+        cached = self.get(key, not_before)
+        if cached is not None:
+            return cached
+        value = compute()
+        if isinstance(value, str) and value:
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+# Concurrent identical requests share one call to the model.
+_in_flight = SingleFlight()
+
+
+def get_llm_cache():
+    """Return the process-wide cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    os.path.join(os.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm")), "responses.sqlite3"),
+                    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+                    ttl=float(os.getenv("LLM_CACHE_TTL", 86400)),
+                    cache_sampled=_env_flag("LLM_CACHE_SAMPLED", True),
+                )
+    return _cache
+
+
+def cached_completion(model, params, prompt, compute, bypass=None, not_before=None):
+    """Shortcut for ``get_llm_cache().get_or_compute(...)``.
+
+    Callers that arrive while an identical request (same model, parameters,
+    prompt and cache options) is still running wait for it and share its
+    result instead of sending a duplicate.
+    """
+    def run():
+        if _env_flag("LLM_CACHE_DISABLED", False):
+            return compute()
+        return get_llm_cache().get_or_compute(model, params, prompt, compute, bypass=bypass, not_before=not_before)
+
+    return _in_flight.do((cache_key(model, params, prompt), bypass, not_before), run)
+
+
+def in_flight_stats():
+    """Counts of leader calls and coalesced duplicates for ``cached_completion``."""
+    return _in_flight.stats()
+
+
+def cached_stream(model, params, prompt, stream, bypass=None, not_before=None):
+    """Streaming counterpart of ``cached_completion``.
+
+    Yields the cached completion in one piece on a hit; otherwise yields the
+    deltas from ``stream()`` and stores the joined text once it completes.
+    """
+    if _env_flag("LLM_CACHE_DISABLED", False):
+        yield from stream()
+        return
+    cache = get_llm_cache()
+    if bypass is None:
+        bypass = cache.should_bypass(params)
+    key = cache_key(model, params, prompt)
+    if not bypass:
+        cached = cache.get(key, not_before)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
+    for delta in stream():
+        parts.append(delta)
+        yield delta
+    if parts and not bypass:
+        cache.set(key, "".join(parts))
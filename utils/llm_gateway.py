@@ -0,0 +1,463 @@
+"""Process-wide gateway for every LLM call the dashboards make.
+
+All Streamlit sessions share one ``LLMGateway``. Before a request reaches a
+provider it waits for:
+
+- the provider's request and token buckets, so bursts are smoothed out before
+  the provider answers with 429s;
+- a concurrency slot.
+
+Both are handed out in priority order (``INTERACTIVE`` before ``BATCH``), and
+rate-limit waits happen before a slot is taken, so throttled background work
+never holds the slots a user waiting on a reply needs.
+
+Throttled and transient failures are retried with full-jitter exponential
+backoff, honouring ``Retry-After`` when the provider sends one.
+
+Configuration (environment variables):
+
+- ``LLM_PROVIDER``: set to ``fake`` to answer every call offline with
+  ``FakeProvider``
+- ``LLM_MAX_CONCURRENCY``: requests in flight across all providers (default 8)
+- ``LLM_<PROVIDER>_RPM`` / ``LLM_<PROVIDER>_TPM``: requests and tokens per
+  minute for one provider, e.g. ``LLM_GROQ_TPM``; ``0`` means unlimited
+- ``LLM_MAX_RETRIES``: retries after the first attempt (default 3)
+- ``LLM_RETRY_BASE`` / ``LLM_RETRY_CAP``: backoff base and ceiling in seconds
+  (default 0.5 / 20)
+"""
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+
+from utils import http
+from utils.http import RETRY_STATUSES, env_number
+from utils.conversation import estimate_tokens
+from utils.ibm_iam import get_token_manager
+from utils.sse import iter_sse_events, iter_watsonx_text
+
+INTERACTIVE = 0
+BATCH = 10
+
+# Requests and tokens per minute used when no environment override is set.
+DEFAULT_LIMITS = {
+    "groq": (30, 6000),
+    "watsonx": (120, 0),
+}
+
+WATSONX_URL = "https://us-south.ml.cloud.ibm.com/ml/v1"
+WATSONX_VERSION = "2023-05-29"
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderError(Exception):
+    """A provider call failed; ``retryable`` marks throttling and transient errors."""
+
+    def __init__(self, message, status=None, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _retry_after(headers):
+    try:
+        return float((headers or {}).get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units a minute, bursting up to one minute's worth.
+
+    Waiters are served lowest priority value first (FIFO within a priority):
+    only the head of the queue may take units, so a batch request cannot drain
+    the budget an interactive request is waiting for.
+
+    ``consume`` may drive the balance negative (e.g. when a completion turns
+    out longer than expected); later ``acquire`` calls wait off the debt.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1, priority=INTERACTIVE):
+        """Block until ``amount`` units are available, take them and return the seconds waited."""
+        amount = min(amount, self.capacity)
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._order))
+            heapq.heappush(self._waiters, ticket)
+            # A new head may now be first in line; let it recompute its wait.
+            self._cond.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                    elif self._tokens >= amount:
+                        self._tokens -= amount
+                        return now - started
+                    else:
+                        self._cond.wait((amount - self._tokens) / self.rate)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def consume(self, amount):
+        with self._cond:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+
+    def queued(self):
+        with self._cond:
+            return len(self._waiters)
+
+
+class PriorityLimiter:
+    """A counting semaphore whose waiters are woken lowest priority value first."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def acquire(self, priority=INTERACTIVE):
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return
+            ready = threading.Event()
+            heapq.heappush(self._waiters, (priority, next(self._order), ready))
+        # The releasing thread hands its slot straight to us, so ``active`` is unchanged.
+        ready.wait()
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                _, _, ready = heapq.heappop(self._waiters)
+                ready.set()
+            else:
+                self.active -= 1
+
+    def queued(self):
+        with self._lock:
+            return len(self._waiters)
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=3, base=0.5, cap=20.0):
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt, error=None):
+        """Full-jitter backoff for retry number ``attempt`` (starting at 0)."""
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.cap))
+        return delay
+
+
+class GroqProvider:
+    """Groq chat completions; the gateway owns retries, so the SDK's are turned off."""
+
+    def __init__(self, api_key=None):
+        from groq import Groq
+
+        self.client = Groq(api_key=api_key or os.getenv("GROQ_API_KEY"), max_retries=0)
+
+    def _translate(self, exc):
+        import groq
+
+        if isinstance(exc, groq.APIStatusError):
+            status = exc.status_code
+            return ProviderError(str(exc), status=status, retryable=status in RETRY_STATUSES,
+                                 retry_after=_retry_after(exc.response.headers))
+        if isinstance(exc, groq.APIConnectionError):
+            return ProviderError(str(exc), retryable=True)
+        return exc
+
+    def _create(self, model, prompt, params, **options):
+        try:
+            return self.client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                **params,
+                **options
+            )
+        except Exception as e:
+            raise self._translate(e) from e
+
+    def complete(self, model, prompt, params, extra=None):
+        return self._create(model, prompt, params).choices[0].message.content
+
+    def stream(self, model, prompt, params, extra=None):
+        try:
+            for chunk in self._create(model, prompt, params, stream=True):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except ProviderError:
+            raise
+        except Exception as e:
+            raise self._translate(e) from e
+
+
+class WatsonxProvider:
+    """watsonx.ai text generation over a keep-alive session.
+
+    ``extra`` is merged into the request body for fields that are not
+    generation parameters, such as ``project_id`` and ``moderations``.
+    """
+
+    def __init__(self, api_key=None, base_url=WATSONX_URL, version=WATSONX_VERSION):
+        self.api_key = api_key or os.getenv("GRANITE_API_KEY")
+        self.generation_url = f"{base_url}/text/generation?version={version}"
+        self.stream_url = f"{base_url}/text/generation_stream?version={version}"
+        # Retries happen in the gateway, with jitter; don't stack urllib3's on top.
+        self.session = http.create_session(max_retries=0)
+
+    def _post(self, url, model, prompt, params, extra, accept, stream=False):
+        headers = {
+            "Accept": accept,
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {get_token_manager(self.api_key).get_token()}"
+        }
+        body = {"input": prompt, "parameters": params, "model_id": model, **(extra or {})}
+        try:
+            response = self.session.post(url, headers=headers, json=body, stream=stream, timeout=http.default_timeout())
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise ProviderError(str(e), retryable=True) from e
+        if response.status_code != 200:
+            with response:
+                raise ProviderError(f"API Error: {response.text}", status=response.status_code,
+                                    retryable=response.status_code in RETRY_STATUSES,
+                                    retry_after=_retry_after(response.headers))
+        return response
+
+    def complete(self, model, prompt, params, extra=None):
+        response = self._post(self.generation_url, model, prompt, params, extra, "application/json")
+        return response.json().get("results", [{}])[0].get("generated_text", "")
+
+    def stream(self, model, prompt, params, extra=None):
+        response = self._post(self.stream_url, model, prompt, params, extra, "text/event-stream", stream=True)
+        with response:
+            # Raw bytes: SSE is always UTF-8, but requests would guess ISO-8859-1
+            # for a text/event-stream response without a charset.
+            yield from iter_watsonx_text(iter_sse_events(response.iter_lines()))
+
+
+class FakeProvider:
+    """Offline stand-in that answers from ``respond(model, prompt, params)``.
+
+    ``failures`` makes the first N calls raise a retryable 429, which is
+    enough to exercise the retry path without a network.
+    """
+
+    def __init__(self, respond=None, latency=0.0, failures=0):
+        self.respond = respond or (lambda model, prompt, params: f"[{model}] {prompt[-200:]}")
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self, model, prompt, params):
+        with self._lock:
+            self.calls += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise ProviderError("Fake rate limit", status=429, retryable=True)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.respond(model, prompt, params)
+
+    def complete(self, model, prompt, params, extra=None):
+        return self._call(model, prompt, params)
+
+    def stream(self, model, prompt, params, extra=None):
+        for word in self._call(model, prompt, params).split(" "):
+            yield word + " "
+
+
+PROVIDER_FACTORIES = {
+    "groq": GroqProvider,
+    "watsonx": WatsonxProvider,
+}
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency=8, retry_policy=None):
+        self.limiter = PriorityLimiter(max_concurrency)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._providers = {}
+        self._limits = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+
+    def register(self, name, provider, rpm=None, tpm=None):
+        """Install ``provider`` under ``name`` with optional per-minute limits (``0`` = unlimited)."""
+        default_rpm, default_tpm = DEFAULT_LIMITS.get(name, (0, 0))
+        rpm = rpm if rpm is not None else env_number(f"LLM_{name.upper()}_RPM", default_rpm)
+        tpm = tpm if tpm is not None else env_number(f"LLM_{name.upper()}_TPM", default_tpm)
+        with self._lock:
+            self._providers[name] = provider
+            self._limits[name] = (TokenBucket(rpm) if rpm else None, TokenBucket(tpm) if tpm else None)
+
+    def provider(self, name):
+        """Return the provider registered as ``name``, building a default one on first use."""
+        with self._lock:
+            provider = self._providers.get(name)
+        if provider is not None:
+            return provider
+        # Build once: a second registration would replace the client and reset its buckets.
+        with self._build_lock:
+            with self._lock:
+                provider = self._providers.get(name)
+            if provider is None:
+                if os.getenv("LLM_PROVIDER") == "fake":
+                    provider = FakeProvider()
+                elif name in PROVIDER_FACTORIES:
+                    provider = PROVIDER_FACTORIES[name]()
+                else:
+                    raise KeyError(f"Unknown LLM provider: {name}")
+                self.register(name, provider)
+        return provider
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def _admit(self, name, prompt, priority):
+        """Wait for rate-limit budget; called before taking a concurrency slot."""
+        requests_bucket, tokens_bucket = self._limits[name]
+        waited = 0.0
+        if requests_bucket:
+            waited += requests_bucket.acquire(1, priority)
+        if tokens_bucket:
+            waited += tokens_bucket.acquire(estimate_tokens(prompt), priority)
+        if waited:
+            self._count("throttled_seconds", waited)
+
+    def _charge(self, name, text):
+        tokens_bucket = self._limits[name][1]
+        if tokens_bucket and text:
+            tokens_bucket.consume(estimate_tokens(text))
+
+    def _backoff(self, name, attempt, error):
+        if not getattr(error, "retryable", False) or attempt >= self.retry_policy.max_retries:
+            self._count("failures")
+            return False
+        self._count("retries")
+        delay = self.retry_policy.delay(attempt, error)
+        logger.warning("%s request failed (%s); retry %d in %.1fs", name, error, attempt + 1, delay)
+        time.sleep(delay)
+        return True
+
+    def complete(self, name, model, prompt, params, priority=INTERACTIVE, extra=None):
+        """Return the full completion text, waiting for rate-limit budget and a slot first."""
+        provider = self.provider(name)
+        for attempt in itertools.count():
+            self._admit(name, prompt, priority)
+            self.limiter.acquire(priority)
+            try:
+                self._count("requests")
+                text = provider.complete(model, prompt, params, extra=extra)
+            except Exception as e:
+                error = e
+            else:
+                self._charge(name, text)
+                return text
+            finally:
+                self.limiter.release()
+            # Back off without holding a slot so other requests keep flowing.
+            if not self._backoff(name, attempt, error):
+                raise error
+
+    def stream(self, name, model, prompt, params, priority=INTERACTIVE, extra=None):
+        """Yield completion deltas; retries only happen before the first delta arrives."""
+        provider = self.provider(name)
+        for attempt in itertools.count():
+            started = False
+            parts = []
+            self._admit(name, prompt, priority)
+            self.limiter.acquire(priority)
+            try:
+                self._count("requests")
+                for delta in provider.stream(model, prompt, params, extra=extra):
+                    started = True
+                    parts.append(delta)
+                    yield delta
+            except Exception as e:
+                error = e
+            else:
+                return
+            finally:
+                self.limiter.release()
+                self._charge(name, "".join(parts))
+            if started:
+                self._count("failures")
+                raise error
+            if not self._backoff(name, attempt, error):
+                raise error
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["active"] = self.limiter.active
+        stats["queued"] = self.limiter.queued()
+        with self._lock:
+            buckets = [bucket for limits in self._limits.values() for bucket in limits if bucket]
+        stats["rate_limited"] = sum(bucket.queued() for bucket in buckets)
+        return stats
+
+    def summary(self):
+        """One-line view of ``stats()`` for status captions."""
+        stats = self.stats()
+        return (
+            f"LLM gateway: {stats['requests']} requests, {stats['retries']} retries, {stats['failures']} failed; "
+            f"{stats['active']} in flight, {stats['queued']} waiting for a slot, {stats['rate_limited']} rate-limited "
+            f"({stats['throttled_seconds']:.0f}s throttled so far)"
+        )
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide gateway, creating it on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway(
+                    max_concurrency=env_number("LLM_MAX_CONCURRENCY", 8, int),
+                    retry_policy=RetryPolicy(
+                        max_retries=env_number("LLM_MAX_RETRIES", 3, int),
+                        base=env_number("LLM_RETRY_BASE", 0.5),
+                        cap=env_number("LLM_RETRY_CAP", 20.0),
+                    ),
+                )
+    return _gateway
@@ -0,0 +1,64 @@
+"""Progressive rendering of streamed LLM completions with latency metrics."""
+import time
+
+
+class StreamMetrics:
+    """Time to first token and throughput for one streamed completion.
+
+    ``chunks`` counts streamed deltas; providers send roughly one token per
+    delta, so it doubles as an approximate token count.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = 0
+        self.chars = 0
+
+    @property
+    def time_to_first_token(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def tokens_per_second(self):
+        if self.first_token_at is None or self.finished_at is None or self.chunks < 2:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return (self.chunks - 1) / elapsed if elapsed > 0 else None
+
+    def summary(self):
+        parts = []
+        if self.time_to_first_token is not None:
+            parts.append(f"first token {self.time_to_first_token:.2f}s")
+        if self.tokens_per_second is not None:
+            parts.append(f"{self.tokens_per_second:.0f} tokens/s")
+        if self.finished_at is not None:
+            parts.append(f"total {self.finished_at - self.started_at:.2f}s")
+        return " · ".join(parts)
+
+
+def render_stream(deltas, render, metrics=None, min_interval=0.05, cursor="▌"):
+    """Accumulate text deltas, calling ``render(partial_text)`` at most every ``min_interval`` seconds.
+
+    Returns the full text after a final ``render`` without the cursor.
+    """
+    metrics = metrics or StreamMetrics()
+    parts = []
+    last_render = 0.0
+    for delta in deltas:
+        if not delta:
+            continue
+        now = time.perf_counter()
+        if metrics.first_token_at is None:
+            metrics.first_token_at = now
+        metrics.chunks += 1
+        metrics.chars += len(delta)
+        parts.append(delta)
+        if now - last_render >= min_interval:
+            render("".join(parts) + cursor)
+            last_render = now
+    metrics.finished_at = time.perf_counter()
+    text = "".join(parts)
+    render(text)
+    return text
@@ -0,0 +1,91 @@
+"""Pluggable sources of daily closing prices for the E-commerce dashboard.
+
+A source exposes ``closes(tickers, start, end)`` and returns one frame indexed
+by date with a column per ticker. ``YFinanceSource`` is used by default;
+``SyntheticSource`` produces deterministic random walks so the dashboard can
+run offline (set ``MARKET_DATA_SOURCE=synthetic`` or call ``set_source``).
+"""
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+DEFAULT_TICKERS = ("AMZN", "SHOP", "ETSY", "WMT", "TGT")
+
+
+def configured_tickers():
+    """Ticker universe from ``MARKET_TICKERS`` (comma separated) or the defaults."""
+    value = os.getenv("MARKET_TICKERS", "")
+    tickers = [ticker.strip().upper() for ticker in value.split(",") if ticker.strip()]
+    return tuple(dict.fromkeys(tickers)) or DEFAULT_TICKERS
+
+
+class YFinanceSource:
+    """Batched ``yf.download``, one batch at a time.
+
+    Each download already fetches its tickers on yfinance's own threads, and
+    yfinance collects results in module-level state that every call resets,
+    so batches must not run concurrently.
+    """
+
+    def __init__(self, batch_size=100):
+        self.batch_size = batch_size
+
+    def closes(self, tickers, start, end):
+        tickers = list(tickers)
+        frames = [
+            self._download(tickers[i:i + self.batch_size], start, end)
+            for i in range(0, len(tickers), self.batch_size)
+        ]
+        closes = frames[0] if len(frames) == 1 else pd.concat(frames, axis=1)
+        return closes.reindex(columns=tickers)
+
+    @staticmethod
+    def _download(batch, start, end):
+        data = yf.download(
+            batch, start=start, end=end, auto_adjust=True,
+            group_by="column", threads=True, progress=False
+        )
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(batch[0])
+        return closes
+
+
+class SyntheticSource:
+    """Offline source: a reproducible random walk per ticker on business days."""
+
+    def __init__(self, start_price=100.0, volatility=0.02):
+        self.start_price = start_price
+        self.volatility = volatility
+
+    def closes(self, tickers, start, end):
+        # ``end`` is exclusive, matching yf.download.
+        index = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end))
+        index = index[index < pd.Timestamp(end)]
+        values = np.empty((len(index), len(tickers)))
+        for column, ticker in enumerate(tickers):
+            rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+            steps = rng.normal(0, self.volatility, len(index))
+            values[:, column] = self.start_price * np.exp(np.cumsum(steps))
+        return pd.DataFrame(values, index=index, columns=list(tickers))
+
+
+_source = None
+
+
+def set_source(source):
+    global _source
+    _source = source
+
+
+def get_source():
+    global _source
+    if _source is None:
+        if os.getenv("MARKET_DATA_SOURCE", "").lower() == "synthetic":
+            _source = SyntheticSource()
+        else:
+            _source = YFinanceSource()
+    return _source
@@ -0,0 +1,137 @@
+"""Batch payroll runs for the HRMS dashboard.
+
+A run works on one frame of employees joined to their latest salary details,
+computes totals for the whole frame at once, renders the deterministic part of
+every payslip from a template and (optionally) fans out AI narrative
+generation over a bounded thread pool. Finished payslips are appended to a
+JSON-lines file per month, so an interrupted run resumes where it stopped.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+BONUS_COLUMNS = ("bonus", "bonuses", "allowances")
+DEDUCTION_COLUMNS = ("deduction", "deductions", "tax")
+
+SAVED_FIELDS = (
+    "employee_id", "name", "department", "role", "effective_date",
+    "basic_pay", "total_bonuses", "total_deductions", "net_pay",
+    "notes", "narrative_error", "payslip",
+)
+
+PAYSLIP_TEMPLATE = """PAYSLIP - {month} {year}
+
+Employee: {name} (ID {employee_id})
+Department: {department}
+Role: {role}
+Salary Effective Date: {effective_date}
+
+Basic Pay: {basic_pay:,.2f}
+Bonuses: {total_bonuses:,.2f}
+Deductions: {total_deductions:,.2f}
+Net Pay: {net_pay:,.2f}
+"""
+
+
+def build_payroll_frame(employees, salaries, calculate_salary):
+    """Join employees to their latest salary row and compute net pay for every row.
+
+    Returns ``(frame, missing)`` where ``missing`` lists employee ids with no
+    salary details.
+    """
+    employees = pd.DataFrame(employees).rename(columns={"id": "employee_id"})
+    salaries = pd.DataFrame(salaries)
+    if employees.empty or salaries.empty:
+        return pd.DataFrame(), list(employees.get("employee_id", []))
+    if "effective_date" in salaries:
+        salaries = salaries.sort_values("effective_date")
+    salaries = salaries.drop_duplicates("employee_id", keep="last").drop(columns=["id"], errors="ignore")
+    frame = employees.merge(salaries, on="employee_id", how="left")
+    missing = frame.loc[frame["basic_pay"].isna(), "employee_id"].tolist()
+    frame = frame.loc[frame["basic_pay"].notna()].copy()
+
+    bonus_columns = [column for column in BONUS_COLUMNS if column in frame]
+    deduction_columns = [column for column in DEDUCTION_COLUMNS if column in frame]
+    for column in ["basic_pay", *bonus_columns, *deduction_columns]:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0.0)
+    frame["total_bonuses"] = frame[bonus_columns].sum(axis=1) if bonus_columns else 0.0
+    frame["total_deductions"] = frame[deduction_columns].sum(axis=1) if deduction_columns else 0.0
+    frame["net_pay"] = calculate_salary(
+        frame["basic_pay"],
+        [frame[column] for column in bonus_columns],
+        [frame[column] for column in deduction_columns],
+    )
+    return frame.reset_index(drop=True), missing
+
+
+def render_payslip_text(record, month, year):
+    values = {key: ("-" if value is None or value != value else value) for key, value in record.items()}
+    values.setdefault("department", "-")
+    values.setdefault("role", "-")
+    values.setdefault("effective_date", "-")
+    return PAYSLIP_TEMPLATE.format(month=month, year=year, **values)
+
+
+class PayrollRun:
+    def __init__(self, month, year, state_dir=os.path.join(".cache", "payroll"), narrate=None, max_workers=4):
+        """``narrate(record)`` returns optional AI commentary for one payslip."""
+        self.month = month
+        self.year = year
+        self.narrate = narrate
+        self.max_workers = max_workers
+        self.path = os.path.join(state_dir, f"{year}-{month}.jsonl")
+
+    def completed(self):
+        """Payslips already produced by this run, keyed by employee id."""
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as handle:
+            records = (json.loads(line) for line in handle if line.strip())
+            return {record["employee_id"]: record for record in records}
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def run(self, frame):
+        """Yield ``(done, total, record)`` as each payslip finishes, skipping finished ones."""
+        done_ids = set(self.completed())
+        records = [
+            record for record in frame.to_dict("records")
+            if record["employee_id"] not in done_ids
+        ]
+        total = len(done_ids) + len(records)
+        done = len(done_ids)
+        for record in records:
+            record["payslip"] = render_payslip_text(record, self.month, self.year)
+        if self.narrate is None:
+            for record in records:
+                done += 1
+                yield done, total, self._save(record)
+            return
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(self.narrate, record): record for record in records}
+            for future in as_completed(futures):
+                record = futures[future]
+                try:
+                    narrative = future.result()
+                except Exception as e:
+                    narrative = None
+                    record["narrative_error"] = str(e)
+                if narrative:
+                    record["notes"] = narrative.strip()
+                    record["payslip"] += f"\nNotes:\n{record['notes']}\n"
+                done += 1
+                yield done, total, self._save(record)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _save(self, record):
+        saved = {key: record.get(key) for key in SAVED_FIELDS if key in record}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(saved, default=str) + "\n")
+        return saved
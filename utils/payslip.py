@@ -0,0 +1,124 @@
+"""Deterministic payslip rendering (HTML and PDF) from payroll records.
+
+A record is one row of ``utils.payroll.build_payroll_frame`` (or a saved
+payroll-run record). Rendering is local and takes milliseconds; AI commentary
+is only included when the record carries ``notes``.
+"""
+import html
+import io
+import zipfile
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+PAYSLIP_FIELDS = [
+    ("Employee", "name"),
+    ("Employee ID", "employee_id"),
+    ("Department", "department"),
+    ("Role", "role"),
+    ("Salary Effective Date", "effective_date"),
+]
+PAYSLIP_AMOUNTS = [
+    ("Basic Pay", "basic_pay"),
+    ("Bonuses", "total_bonuses"),
+    ("Deductions", "total_deductions"),
+    ("Net Pay", "net_pay"),
+]
+
+
+def _value(record, key):
+    value = record.get(key)
+    return "-" if value is None or value != value else str(value)
+
+
+def _amount(record, key):
+    value = record.get(key)
+    return f"{float(value or 0):,.2f}"
+
+
+def render_payslip_html(record, month, year):
+    rows = "".join(
+        f"<tr><th>{label}</th><td>{html.escape(_value(record, key))}</td></tr>" for label, key in PAYSLIP_FIELDS
+    )
+    amounts = "".join(
+        f"<tr><th>{label}</th><td style='text-align:right'>{_amount(record, key)}</td></tr>"
+        for label, key in PAYSLIP_AMOUNTS
+    )
+    notes = f"<h3>Notes</h3><p>{html.escape(record['notes'])}</p>" if record.get("notes") else ""
+    return f"""<div class="payslip">
+    <h2>Payslip - {html.escape(str(month))} {html.escape(str(year))}</h2>
+    <table>{rows}</table>
+    <table>{amounts}</table>
+    {notes}
+</div>"""
+
+
+def draw_payslip(pdf, record, month, year):
+    """Draw one payslip on the current page of a reportlab canvas."""
+    width, height = letter
+    y = height - 60
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(50, y, f"Payslip - {month} {year}")
+    y -= 40
+    pdf.setFont("Helvetica", 12)
+    for label, key in PAYSLIP_FIELDS:
+        pdf.drawString(50, y, f"{label}:")
+        pdf.drawString(220, y, _value(record, key))
+        y -= 20
+    y -= 20
+    for label, key in PAYSLIP_AMOUNTS:
+        if key == "net_pay":
+            pdf.line(50, y + 14, width - 50, y + 14)
+            pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawString(50, y, label)
+        pdf.drawRightString(width - 50, y, _amount(record, key))
+        y -= 20
+    pdf.setFont("Helvetica", 12)
+    if record.get("notes"):
+        y -= 20
+        pdf.drawString(50, y, "Notes:")
+        y -= 20
+        for line in _wrap(pdf, record["notes"], width - 100):
+            pdf.drawString(50, y, line)
+            y -= 16
+            if y < 50:
+                break
+
+
+def _wrap(pdf, text, max_width):
+    lines = []
+    for paragraph in text.splitlines():
+        current = []
+        for word in paragraph.split():
+            current.append(word)
+            if pdf.stringWidth(" ".join(current)) > max_width and len(current) > 1:
+                current.pop()
+                lines.append(" ".join(current))
+                current = [word]
+        lines.append(" ".join(current))
+    return lines
+
+
+def render_payslips_pdf(records, month, year):
+    """One PDF with a page per record."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for record in records:
+        draw_payslip(pdf, record, month, year)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render_payslip_pdf(record, month, year):
+    return render_payslips_pdf([record], month, year)
+
+
+def render_payslips_zip(records, month, year):
+    """A zip archive with one PDF per record."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for record in records:
+            name = f"payslip-{record['employee_id']}-{year}-{month}.pdf"
+            archive.writestr(name, render_payslip_pdf(record, month, year))
+    return buffer.getvalue()
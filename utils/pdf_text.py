@@ -0,0 +1,88 @@
+"""PDF text extraction for resume screening.
+
+Long documents are split into contiguous page ranges that are extracted in a
+shared process pool (pdfplumber is CPU bound, so threads do not help). Short
+documents are extracted inline, where the pool start-up would cost more than it
+saves.
+"""
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+# Name used to key cached text produced by this module (see utils.text_cache).
+PDF_EXTRACTOR = "pdfplumber"
+POOL_MIN_PAGES = int(os.getenv("PDF_POOL_MIN_PAGES", 8))
+POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", max(1, min(4, os.cpu_count() or 1))))
+
+# Everything that is neither alphanumeric nor whitespace (``\w`` also matches "_").
+_DISALLOWED_CHARS = re.compile(r"[^\w\s]|_")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def clean_text(text):
+    """Collapse whitespace, then drop characters that are not alphanumeric or spaces."""
+    return _DISALLOWED_CHARS.sub("", " ".join(text.split()))
+
+
+def _extract_page_range(data, start, stop):
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [(page.extract_text() or "") for page in pdf.pages[start:stop]]
+
+
+def get_pool():
+    """The shared extraction process pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a multi-threaded Streamlit server is not safe.
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    with open(source, "rb") as handle:
+        return handle.read()
+
+
+def iter_page_texts(source, min_pages_for_pool=POOL_MIN_PAGES):
+    """Yield the text of each page in order, extracting page ranges in parallel when worthwhile."""
+    data = _read_bytes(source)
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        page_count = len(pdf.pages)
+        if page_count < min_pages_for_pool or POOL_WORKERS == 1:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+            return
+    step = -(-page_count // POOL_WORKERS)
+    pool = get_pool()
+    futures = [
+        pool.submit(_extract_page_range, data, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    for future in futures:
+        yield from future.result()
+
+
+def extract_document_text(data):
+    """Extract a whole PDF serially; used when whole documents are spread over the pool."""
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return "\n".join((page.extract_text() or "") for page in pdf.pages)
+
+
+def extract_pdf_text(source, min_pages_for_pool=POOL_MIN_PAGES):
+    """Full text of a PDF with pages separated by newlines."""
+    return "\n".join(iter_page_texts(source, min_pages_for_pool))
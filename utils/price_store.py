@@ -0,0 +1,152 @@
+"""On-disk store of daily closing prices with incremental refresh.
+
+Closes are kept in a single Parquet file (one column per ticker, one row per
+trading day). ``sync`` only asks the market data source for the dates that are
+missing for each ticker, so a refresh costs a few rows instead of a full
+re-download, and the history survives process restarts.
+
+The earliest date requested for each ticker is kept in a JSON file next to the
+Parquet file. A lookback that starts on a weekend, a holiday or before a
+listing therefore does not look like a gap on every refresh.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from utils.market_data import get_source
+
+
+def _normalize_index(frame):
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame = frame.copy()
+    frame.index = index.normalize()
+    frame.index.name = "Date"
+    return frame[~frame.index.duplicated(keep="last")].sort_index()
+
+
+class PriceHistoryStore:
+    def __init__(self, path, source=None):
+        self.path = path
+        self.source = source
+        self._lock = threading.Lock()
+        self._frame = None
+        self._mtime = None
+        self._covered_from = {}
+
+    @property
+    def coverage_path(self):
+        return f"{os.path.splitext(self.path)[0]}.coverage.json"
+
+    def load(self):
+        """Stored closes, re-read only when the file changed on disk."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="Date"))
+        if self._frame is None or mtime != self._mtime:
+            self._frame = pd.read_parquet(self.path)
+            self._mtime = mtime
+            self._covered_from = self._read_coverage()
+        return self._frame
+
+    def sync(self, tickers, lookback_days, end=None):
+        """Fetch whatever is missing to cover ``lookback_days`` up to ``end`` for each ticker."""
+        end = pd.Timestamp(end or datetime.now()).normalize()
+        start = end - timedelta(days=lookback_days)
+        with self._lock:
+            frame = self.load()
+            ranges = {}
+            for ticker in tickers:
+                for fetch_range in self._missing_ranges(frame, ticker, start, end, self._covered_from.get(ticker)):
+                    ranges.setdefault(fetch_range, []).append(ticker)
+            if not ranges:
+                return frame
+            source = self.source or get_source()
+            updates = [
+                source.closes(batch, range_start, range_end + timedelta(days=1))
+                for (range_start, range_end), batch in ranges.items()
+            ]
+            for (range_start, _), batch in ranges.items():
+                for ticker in batch:
+                    covered = self._covered_from.get(ticker)
+                    self._covered_from[ticker] = range_start if covered is None else min(covered, range_start)
+            updates = [_normalize_index(update) for update in updates if not update.empty]
+            if not updates:
+                self._write_coverage()
+                return frame
+            fetched = updates[0]
+            for update in updates[1:]:
+                fetched = update.combine_first(fetched)
+            frame = fetched.combine_first(frame) if not frame.empty else fetched
+            self._write(frame)
+            return frame
+
+    def window(self, tickers, lookback_days, end=None):
+        """Closes for ``tickers`` over the last ``lookback_days``, served from disk."""
+        end = pd.Timestamp(end or datetime.now()).normalize()
+        start = end - timedelta(days=lookback_days)
+        frame = self.load()
+        return frame.loc[(frame.index >= start) & (frame.index <= end)].reindex(columns=list(tickers))
+
+    @staticmethod
+    def _missing_ranges(frame, ticker, start, end, covered_from=None):
+        if ticker not in frame.columns or frame[ticker].dropna().empty:
+            return [(start, end)]
+        stored = frame[ticker].dropna().index
+        ranges = []
+        # Bars before the first stored one may simply not exist; only ask once.
+        first = stored[0] if covered_from is None else min(stored[0], covered_from)
+        if first > start:
+            ranges.append((start, first - timedelta(days=1)))
+        if stored[-1] <= end:
+            # Re-fetch the last stored bar too, in case it was captured intraday.
+            ranges.append((stored[-1], end))
+        return ranges
+
+    def _write(self, frame):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, self.path)
+        self._write_coverage()
+        self._frame = frame
+        self._mtime = os.path.getmtime(self.path)
+
+    def _read_coverage(self):
+        try:
+            with open(self.coverage_path) as handle:
+                return {ticker: pd.Timestamp(day) for ticker, day in json.load(handle).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_coverage(self):
+        directory = os.path.dirname(self.coverage_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.coverage_path}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump({ticker: day.date().isoformat() for ticker, day in self._covered_from.items()}, handle)
+        os.replace(tmp_path, self.coverage_path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Return the process-wide store at ``MARKET_STORE_PATH`` (default ``.cache/market/closes.parquet``)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceHistoryStore(
+                    os.getenv("MARKET_STORE_PATH", os.path.join(".cache", "market", "closes.parquet"))
+                )
+    return _store
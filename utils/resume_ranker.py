@@ -0,0 +1,108 @@
+"""Batch resume screening: parallel extraction and lexical ranking.
+
+Resumes are extracted one document per pool worker and scored against the
+job description as they finish. The score is a keyword-coverage measure: each
+job-description term is weighted by how often the description uses it, and a
+resume's term frequency is saturated (BM25 style) so repetition cannot
+dominate. Scores depend only on the resume and the description, so they are
+stable while results are still streaming in.
+"""
+import io
+import math
+import re
+import zipfile
+from collections import Counter
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from utils.pdf_text import PDF_EXTRACTOR, clean_text, extract_document_text, get_pool
+from utils.text_cache import get_text_cache, text_key
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could did do does
+for from had has have having he her his how i if in into is it its may more most must no not
+of on or our out over she should so some such than that the their them then there these they
+this those through to under up us we were what when where which while who will with within
+would you your job role candidate candidates work working experience years year team ability
+strong excellent good knowledge skills skill required requirements preferred responsibilities
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def iter_uploaded_pdfs(uploaded_files):
+    """Yield ``(name, pdf_bytes)`` from uploaded PDFs and zip archives of PDFs."""
+    for uploaded_file in uploaded_files:
+        if Path(uploaded_file.name).suffix.lower() == ".zip":
+            with zipfile.ZipFile(io.BytesIO(uploaded_file.getvalue())) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and member.filename.lower().endswith(".pdf"):
+                        yield Path(member.filename).name, archive.read(member)
+        else:
+            yield uploaded_file.name, uploaded_file.getvalue()
+
+
+class JobDescriptionScorer:
+    def __init__(self, job_description, saturation=1.2):
+        counts = Counter(tokenize(job_description))
+        self.weights = {term: 1 + math.log(count) for term, count in counts.items()}
+        self.total_weight = sum(self.weights.values()) or 1.0
+        self.saturation = saturation
+
+    def score(self, text):
+        """Keyword coverage in ``[0, 1]`` and the matched job-description terms."""
+        counts = Counter(tokenize(text))
+        score = 0.0
+        matched = []
+        for term, weight in self.weights.items():
+            frequency = counts.get(term, 0)
+            if frequency:
+                score += weight * frequency / (frequency + self.saturation)
+                matched.append(term)
+        return score / self.total_weight, matched
+
+
+def screen_resumes(documents, job_description):
+    """Extract and score ``(name, pdf_bytes)`` documents in parallel.
+
+    Yields one result dict per resume as soon as its extraction finishes.
+    """
+    scorer = JobDescriptionScorer(job_description)
+    cache = get_text_cache()
+    pool = get_pool()
+    cached = []
+    futures = {}
+    for name, data in documents:
+        key = text_key(data, PDF_EXTRACTOR)
+        raw_text = cache.get(key)
+        if raw_text is not None:
+            cached.append((name, raw_text))
+        else:
+            futures[pool.submit(extract_document_text, data)] = (name, key)
+    for name, raw_text in cached:
+        yield _score_resume(scorer, name, raw_text)
+    for future in as_completed(futures):
+        name, key = futures[future]
+        try:
+            raw_text = future.result()
+        except Exception as e:
+            yield {"name": name, "score": 0.0, "matched": [], "text": "", "error": str(e)}
+            continue
+        cache.put(key, raw_text)
+        yield _score_resume(scorer, name, raw_text)
+
+
+def _score_resume(scorer, name, raw_text):
+    # Score the raw text so terms like "c++" or "node.js" survive.
+    score, matched = scorer.score(raw_text)
+    text = clean_text(raw_text)
+    return {
+        "name": name,
+        "score": score,
+        "matched": matched,
+        "text": text,
+        "error": None if text.strip() else "No text could be extracted",
+    }
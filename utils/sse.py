@@ -0,0 +1,62 @@
+"""Incremental parser for server-sent event (SSE) streams.
+
+The parser works on any iterable of lines (``response.iter_lines()``, a file,
+a list from a recorded fixture) and yields each event as soon as its blank-line
+terminator arrives.
+"""
+import json
+
+
+def iter_sse_events(lines):
+    """Yield ``{"event", "id", "data"}`` dicts from an iterable of SSE lines.
+
+    Byte lines are decoded as UTF-8, the only encoding SSE allows.
+    """
+    event = {}
+    data_lines = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.rstrip("\r\n")
+        if not line:
+            if data_lines or event:
+                yield _build_event(event, data_lines)
+            event = {}
+            data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data_lines.append(value)
+        elif field in ("event", "id", "retry"):
+            event[field] = value
+    if data_lines or event:
+        yield _build_event(event, data_lines)
+
+
+def _build_event(event, data_lines):
+    return {
+        "event": event.get("event", "message"),
+        "id": event.get("id"),
+        "data": "\n".join(data_lines),
+    }
+
+
+def iter_watsonx_text(events):
+    """Yield generated text fragments from watsonx ``generation_stream`` events."""
+    for event in events:
+        if event["event"] == "error":
+            raise Exception(f"API Error: {event['data']}")
+        if event["event"] != "message" or not event["data"]:
+            continue
+        try:
+            payload = json.loads(event["data"])
+        except ValueError:
+            continue
+        for result in payload.get("results", []):
+            text = result.get("generated_text")
+            if text:
+                yield text
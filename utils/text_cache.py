@@ -0,0 +1,168 @@
+"""Content-addressed cache of text extracted from uploaded documents.
+
+Keys are a SHA-256 of the extractor name and the file bytes, so the same upload
+is never parsed twice, whichever page it comes from. Recently used texts stay
+in memory up to a byte budget; older ones, and any text larger than the whole
+budget, are spilled to disk and promoted back on the next hit. Spilled files
+(which may hold resume text) are deleted once unused for the disk TTL, checked
+at startup and whenever the disk tier is trimmed.
+
+Configuration (environment variables):
+
+- ``TEXT_CACHE_MEMORY_BYTES``: in-memory budget (default 64 MB)
+- ``TEXT_CACHE_DISK_BYTES``: on-disk budget (default 512 MB)
+- ``TEXT_CACHE_DISK_TTL``: seconds a spilled file may go unused (default 1 day)
+- ``TEXT_CACHE_DIR``: spill directory (default ``.cache/text``)
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def text_key(data, extractor):
+    digest = hashlib.sha256(extractor.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ExtractedTextCache:
+    def __init__(self, directory, memory_budget=64 * 1024 * 1024, disk_budget=512 * 1024 * 1024, disk_ttl=86400):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.disk_ttl = disk_ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._trim_disk()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        text = self._read_spill(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        self._remember(key, text)
+
+    def get_or_extract(self, data, extractor, extract):
+        """Return cached text for ``data`` or run ``extract(data)`` and cache it."""
+        key = text_key(data, extractor)
+        text = self.get(key)
+        if text is None:
+            text = extract(data)
+            self.put(key, text)
+        return text
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def _remember(self, key, text):
+        size = len(text.encode("utf-8"))
+        if size > self.memory_budget:
+            self._spill(key, text)
+            self._trim_disk()
+            return
+        spilled = []
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_budget:
+                old_key, old_text = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old_text.encode("utf-8"))
+                spilled.append((old_key, old_text))
+        for old_key, old_text in spilled:
+            self._spill(old_key, old_text)
+        if spilled:
+            self._trim_disk()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt.gz")
+
+    def _spill(self, key, text):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        if not os.path.exists(path):
+            with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as handle:
+                handle.write(text)
+            os.replace(f"{path}.tmp", path)
+
+    def _read_spill(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) >= self.disk_ttl:
+                os.remove(path)
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                text = handle.read()
+        except OSError:
+            return None
+        os.utime(path)
+        return text
+
+    def _trim_disk(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith((".txt.gz", ".tmp"))]
+        except OSError:
+            return
+        expired_before = time.time() - self.disk_ttl
+        for entry in [entry for entry in entries if entry.stat().st_mtime < expired_before]:
+            entries.remove(entry)
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.disk_budget:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_text_cache():
+    """Return the process-wide cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractedTextCache(
+                os.getenv("TEXT_CACHE_DIR", os.path.join(".cache", "text")),
+                memory_budget=int(os.getenv("TEXT_CACHE_MEMORY_BYTES", 64 * 1024 * 1024)),
+                disk_budget=int(os.getenv("TEXT_CACHE_DISK_BYTES", 512 * 1024 * 1024)),
+                disk_ttl=float(os.getenv("TEXT_CACHE_DISK_TTL", 86400)),
+            )
+        return _cache